@@ -17,7 +17,7 @@ def create_app(config_class=Config):
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
-    CORS(app)
+    CORS(app, expose_headers=['X-Next-Cursor', 'ETag', 'Last-Modified'])
     mail.init_app(app)
     
     # Register blueprints
@@ -35,6 +35,10 @@ def create_app(config_class=Config):
     app.register_blueprint(financial_bp, url_prefix='/api/financial')
     app.register_blueprint(assignments_bp, url_prefix='/api/assignments')
     
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Create database tables
     with app.app_context():
         db.create_all()
@@ -43,5 +47,17 @@ def create_app(config_class=Config):
         from app.tasks.scheduled_tasks import init_scheduler
         global scheduler
         scheduler = init_scheduler()
+        
+        # Start the post-upload processing workers
+        from app.services.processing_service import init_processing_workers
+        init_processing_workers(app)
+        
+        # Create the chat pub/sub hub
+        from app.services.chat_hub import init_chat_hub
+        init_chat_hub(app)
+        
+        # Start the outgoing email sender
+        from app.services.email_outbox_service import init_email_sender
+        init_email_sender(app)
     
     return app
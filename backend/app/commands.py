@@ -0,0 +1,241 @@
+import threading
+import time
+import click
+from flask import current_app
+from sqlalchemy import func, inspect, select
+from sqlalchemy.exc import DatabaseError
+from app import db
+
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI"""
+    app.cli.add_command(create_indexes)
+    app.cli.add_command(rebuild_grade_summary)
+    app.cli.add_command(upgrade_db)
+    app.cli.add_command(gc_blobs)
+    app.cli.add_command(process_uploads)
+    app.cli.add_command(import_users)
+    app.cli.add_command(send_emails)
+    app.cli.add_command(mail_sink)
+    app.cli.add_command(migrate_announcement_notifications)
+
+
+@click.command('create-indexes')
+def create_indexes():
+    """Build any model indexes missing from an existing database.
+
+    db.create_all() skips tables that already exist, so indexes added to a
+    model later are never created on it. This creates them in place with
+    CREATE INDEX, without rebuilding the tables.
+    """
+    from app.models.academic import Attendance, CourseEnrollment
+
+    # Unique indexes cannot be built over rows that already break them
+    unique_keys = [
+        ('enrollment', CourseEnrollment, ('student_id', 'course_id')),
+        ('attendance', Attendance, ('student_id', 'course_id', 'date'))
+    ]
+    found = False
+    for label, model, column_names in unique_keys:
+        columns = [getattr(model, name) for name in column_names]
+        duplicates = db.session.query(*columns, func.count(model.id))\
+            .group_by(*columns)\
+            .having(func.count(model.id) > 1).all()
+        for row in duplicates:
+            key = ', '.join(f'{name} {value}' for name, value in zip(column_names, row))
+            click.echo(f'Duplicate {label}: {key} ({row[-1]} rows)')
+            found = True
+    if found:
+        raise click.ClickException('Remove duplicate rows before creating the unique indexes')
+
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                try:
+                    index.create(bind=db.engine)
+                except DatabaseError as e:
+                    # Expression indexes such as lower(email) are not reflected, so an
+                    # existing one only shows up here
+                    if 'already exists' not in str(e.orig):
+                        raise
+            click.echo(f'Index {index.name} on {table.name} ready')
+
+
+@click.command('rebuild-grade-summary')
+@click.option('--check', is_flag=True, help='Only compare the summary with the raw grades.')
+def rebuild_grade_summary(check):
+    """Backfill grade_summary from Grade, or verify it with --check"""
+    from app.services.grade_summary_service import GradeSummaryService
+
+    if check:
+        mismatches = GradeSummaryService.verify()
+        for student_id, course_id, assessment_type in mismatches:
+            click.echo(f'Mismatch: student {student_id}, course {course_id}, {assessment_type}')
+        if mismatches:
+            raise click.ClickException(f'{len(mismatches)} summary rows differ from the raw grades')
+        click.echo('Grade summary matches the raw grades')
+        return
+
+    count = GradeSummaryService.rebuild()
+    click.echo(f'Rebuilt {count} grade summary rows')
+
+
+@click.command('upgrade-db')
+@click.pass_context
+def upgrade_db(ctx):
+    """Bring an existing database up to the current models.
+
+    Creates missing tables, adds missing columns with ALTER TABLE ADD COLUMN
+    (new columns must be nullable or have a server default), builds any
+    missing indexes and backfills derived tables that start out empty.
+    """
+    from app.models.academic import GradeSummary
+
+    db.create_all()
+
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+            click.echo(f'Added column {table.name}.{column.name}')
+    db.session.commit()
+
+    ctx.invoke(create_indexes)
+
+    # Reads go through grade_summary, so existing grades vanish until it is filled
+    if GradeSummary.query.first() is None:
+        ctx.invoke(rebuild_grade_summary, check=False)
+
+    ctx.invoke(migrate_announcement_notifications)
+
+
+@click.command('gc-blobs')
+def gc_blobs():
+    """Delete stored files that nothing references any more, and expired uploads"""
+    from app.services.blob_store import BlobStore
+    from app.services.upload_service import UploadService
+
+    sessions, files = UploadService.expire_sessions()
+    click.echo(f'Removed {sessions} expired upload sessions and {files} temporary files')
+
+    removed = BlobStore.collect_garbage()
+    click.echo(f'Removed {removed} unreferenced blobs')
+
+
+@click.command('process-uploads')
+@click.option('--limit', type=int, default=None, help='Stop after this many jobs.')
+@click.option('--watch', is_flag=True, help='Keep polling for new jobs instead of exiting.')
+def process_uploads(limit, watch):
+    """Run queued post-upload processing jobs in the foreground"""
+    from app.services.processing_service import ProcessingService
+
+    while True:
+        requeued = ProcessingService.requeue_stale()
+        if requeued:
+            click.echo(f'Requeued {requeued} abandoned jobs')
+        processed = ProcessingService.process_pending(limit)
+        if processed or not watch:
+            click.echo(f'Processed {processed} jobs')
+        if not watch:
+            break
+        time.sleep(current_app.config['PROCESSING_POLL_INTERVAL'])
+
+
+@click.command('import-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--dry-run', is_flag=True, help='Validate the file without creating anyone.')
+@click.option('--workers', type=int, default=None, help='Processes used for password hashing.')
+def import_users(path, dry_run, workers):
+    """Create users and student profiles from a CSV or XLSX file"""
+    from app.services.user_import_service import UserImportService, UserImportError, read_rows
+
+    with open(path, 'rb') as file:
+        try:
+            report = UserImportService.run(read_rows(file, path), dry_run=dry_run, workers=workers)
+        except UserImportError as e:
+            raise click.ClickException(str(e))
+
+    for error in report['errors']:
+        click.echo(f"Row {error['row']} ({error['email'] or 'no email'}): {'; '.join(error['errors'])}")
+    verb = 'Would create' if dry_run else 'Created'
+    click.echo(f"{verb} {report['created']} of {report['total']} users ({report['failed']} rejected)")
+
+
+@click.command('send-emails')
+@click.option('--limit', type=int, default=None, help='Stop after this many messages.')
+def send_emails(limit):
+    """Deliver queued outgoing email in the foreground"""
+    from app.services.email_outbox_service import EmailOutboxService
+
+    requeued = EmailOutboxService.requeue_stale()
+    if requeued:
+        click.echo(f'Requeued {requeued} abandoned messages')
+    attempted = EmailOutboxService.send_pending(limit)
+    click.echo(f'Attempted {attempted} messages')
+
+
+@click.command('mail-sink')
+@click.option('--host', default='localhost')
+@click.option('--port', type=int, default=8025)
+def mail_sink(host, port):
+    """Run a local SMTP server that prints messages instead of delivering them.
+
+    Start the app with MAIL_SERVER=localhost, MAIL_PORT=8025 and
+    MAIL_USE_TLS=false to exercise the outbox without a real mail server.
+    Requires aiosmtpd.
+    """
+    try:
+        from aiosmtpd.controller import Controller
+        from aiosmtpd.handlers import Debugging
+    except ImportError:
+        raise click.ClickException('mail-sink requires aiosmtpd (pip install aiosmtpd)')
+
+    controller = Controller(Debugging(), hostname=host, port=port)
+    controller.start()
+    click.echo(f'SMTP sink listening on {host}:{port}; press Ctrl+C to stop')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        controller.stop()
+
+
+@click.command('migrate-announcement-notifications')
+def migrate_announcement_notifications():
+    """Replace per-user announcement notifications with read markers.
+
+    Announcements are now merged into each feed when it is read, so the old
+    per-user copies would show up twice. Copies that were read become
+    AnnouncementRead markers; all of them are then deleted. Safe to re-run.
+    """
+    from app.models.communication import AnnouncementRead, Notification
+
+    markers = AnnouncementRead.__table__
+    already_marked = select(markers.c.id).where(
+        markers.c.user_id == Notification.user_id,
+        markers.c.announcement_id == Notification.reference_id
+    ).exists()
+    read_copies = select(
+        Notification.user_id,
+        Notification.reference_id,
+        Notification.created_at
+    ).where(
+        Notification.type == 'announcement',
+        Notification.read.is_(True),
+        Notification.reference_id.isnot(None),
+        ~already_marked
+    ).distinct()
+    db.session.execute(markers.insert().from_select(
+        [markers.c.user_id, markers.c.announcement_id, markers.c.read_at],
+        read_copies
+    ))
+    removed = Notification.query.filter_by(type='announcement').delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f'Removed {removed} per-user announcement notifications')
@@ -28,6 +28,9 @@ class Course(db.Model):
         }
 
 class Student(db.Model):
+    __table_args__ = (
+        db.Index('ix_student_current_grade', 'current_grade'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     registration_number = db.Column(db.String(20), unique=True, nullable=False)
@@ -49,6 +52,10 @@ class Student(db.Model):
 
 class CourseEnrollment(db.Model):
     __tablename__ = 'course_enrollment'
+    __table_args__ = (
+        db.Index('ix_course_enrollment_student_course', 'student_id', 'course_id', unique=True),
+        db.Index('ix_course_enrollment_course_status', 'course_id', 'status'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
@@ -56,6 +63,10 @@ class CourseEnrollment(db.Model):
     status = db.Column(db.String(20), default='active')  # active, completed, dropped
 
 class Attendance(db.Model):
+    __table_args__ = (
+        db.Index('ix_attendance_course_date', 'course_id', 'date'),
+        db.Index('ix_attendance_student_course_date', 'student_id', 'course_id', 'date', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
@@ -78,6 +89,10 @@ class Attendance(db.Model):
         }
 
 class Grade(db.Model):
+    __table_args__ = (
+        db.Index('ix_grade_student_course', 'student_id', 'course_id'),
+        db.Index('ix_grade_course_assessment', 'course_id', 'assessment_type'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
@@ -102,3 +117,55 @@ class Grade(db.Model):
             'remarks': self.remarks,
             'date': self.date.isoformat()
         }
+
+class GradeSummary(db.Model):
+    __tablename__ = 'grade_summary'
+    __table_args__ = (
+        db.Index('ix_grade_summary_student_course_type', 'student_id', 'course_id', 'assessment_type', unique=True),
+        db.Index('ix_grade_summary_course', 'course_id'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+    assessment_type = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    max_score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_min = db.Column(db.Float)
+    score_max = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    student = db.relationship('Student', backref='grade_summaries')
+    course = db.relationship('Course', backref='grade_summaries')
+
+    @property
+    def average(self):
+        return self.score_sum / self.count if self.count else 0
+
+    @property
+    def std_dev(self):
+        if not self.count:
+            return 0
+        variance = self.score_sq_sum / self.count - self.average ** 2
+        return max(variance, 0) ** 0.5
+
+    @property
+    def percentage(self):
+        return self.score_sum / self.max_score_sum * 100 if self.max_score_sum else 0
+
+    def to_dict(self):
+        return {
+            'student_id': self.student_id,
+            'course_id': self.course_id,
+            'assessment_type': self.assessment_type,
+            'count': self.count,
+            'score_sum': self.score_sum,
+            'max_score_sum': self.max_score_sum,
+            'average': self.average,
+            'std_dev': self.std_dev,
+            'min': self.score_min,
+            'max': self.score_max,
+            'percentage': self.percentage
+        }
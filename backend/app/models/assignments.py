@@ -1,7 +1,27 @@
 from app import db
 from datetime import datetime
 
+def metadata_summary(metadata, thumbnail_url, include_text=False):
+    """File metadata as served to clients.
+
+    The thumbnail is given as a download URL rather than a server path, and
+    extracted text is left out unless asked for (only the processing
+    endpoints return it).
+    """
+    if not metadata:
+        return metadata
+    summary = {
+        key: value for key, value in metadata.items()
+        if key not in ('thumbnail', 'thumbnail_path') and (include_text or key != 'text')
+    }
+    if metadata.get('thumbnail') or metadata.get('thumbnail_path'):
+        summary['thumbnail_url'] = thumbnail_url
+    return summary
+
 class Assignment(db.Model):
+    __table_args__ = (
+        db.Index('ix_assignment_course_due', 'course_id', 'due_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
@@ -28,15 +48,27 @@ class Assignment(db.Model):
         }
 
 class AssignmentSubmission(db.Model):
+    __table_args__ = (
+        db.Index('ix_assignment_submission_assignment_student', 'assignment_id', 'student_id'),
+        db.Index('ix_assignment_submission_student', 'student_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     assignment_id = db.Column(db.Integer, db.ForeignKey('assignment.id'), nullable=False)
     student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
     submission_date = db.Column(db.DateTime, default=datetime.utcnow)
     file_path = db.Column(db.String(255))
+    file_hash = db.Column(db.String(64))  # SHA-256 of the stored blob
+    original_filename = db.Column(db.String(255))
+    processing_status = db.Column(db.String(20))  # pending, done, failed
+    file_metadata = db.Column(db.JSON)  # Derived by the post-upload processors
     score = db.Column(db.Float)
     feedback = db.Column(db.Text)
     status = db.Column(db.String(20), default='submitted')  # submitted, graded, late
 
+    @property
+    def thumbnail_url(self):
+        return f'/api/assignments/submissions/{self.id}/thumbnail'
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -44,23 +76,38 @@ class AssignmentSubmission(db.Model):
             'student_id': self.student_id,
             'submission_date': self.submission_date.isoformat(),
             'file_path': self.file_path,
+            'file_hash': self.file_hash,
+            'original_filename': self.original_filename,
+            'processing_status': self.processing_status,
+            'file_metadata': metadata_summary(self.file_metadata, self.thumbnail_url),
             'score': self.score,
             'feedback': self.feedback,
             'status': self.status
         }
 
 class CourseMaterial(db.Model):
+    __table_args__ = (
+        db.Index('ix_course_material_course', 'course_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
     file_path = db.Column(db.String(255))
+    file_hash = db.Column(db.String(64))  # SHA-256 of the stored blob
+    original_filename = db.Column(db.String(255))
+    processing_status = db.Column(db.String(20))  # pending, done, failed
+    file_metadata = db.Column(db.JSON)  # Derived by the post-upload processors
     material_type = db.Column(db.String(50))  # lecture_note, assignment, reading
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     course = db.relationship('Course', backref='materials')
 
+    @property
+    def thumbnail_url(self):
+        return f'/api/assignments/materials/{self.id}/thumbnail'
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -68,6 +115,83 @@ class CourseMaterial(db.Model):
             'description': self.description,
             'course_id': self.course_id,
             'file_path': self.file_path,
+            'file_hash': self.file_hash,
+            'original_filename': self.original_filename,
+            'processing_status': self.processing_status,
+            'file_metadata': metadata_summary(self.file_metadata, self.thumbnail_url),
             'material_type': self.material_type,
             'upload_date': self.upload_date.isoformat()
         }
+
+class UploadSession(db.Model):
+    __tablename__ = 'upload_session'
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # assignment, material
+    filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received_size = db.Column(db.BigInteger, nullable=False, default=0)
+    sha256 = db.Column(db.String(64))  # Set once the upload is finalized
+    form_data = db.Column(db.JSON)  # Fields for the record created on finalize
+    status = db.Column(db.String(20), default='uploading')  # uploading, completed
+    expires_at = db.Column(db.DateTime)  # Pushed forward by every chunk; swept by gc-blobs
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'filename': self.filename,
+            'total_size': self.total_size,
+            'received_size': self.received_size,
+            'sha256': self.sha256,
+            'status': self.status,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+class Blob(db.Model):
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'sha256': self.sha256,
+            'size': self.size,
+            'ref_count': self.ref_count,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+class ProcessingJob(db.Model):
+    __tablename__ = 'processing_job'
+    __table_args__ = (
+        db.Index('ix_processing_job_status_created', 'status', 'created_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    item_type = db.Column(db.String(20), nullable=False)  # submission, material
+    item_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'item_type': self.item_type,
+            'item_id': self.item_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -2,6 +2,11 @@ from app import db
 from datetime import datetime
 
 class Message(db.Model):
+    __table_args__ = (
+        db.Index('ix_message_recipient_read', 'recipient_id', 'read'),
+        db.Index('ix_message_recipient_created', 'recipient_id', 'created_at'),
+        db.Index('ix_message_sender_created', 'sender_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -28,6 +33,9 @@ class Message(db.Model):
         }
 
 class Announcement(db.Model):
+    __table_args__ = (
+        db.Index('ix_announcement_target_created', 'target_role', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
@@ -49,7 +57,38 @@ class Announcement(db.Model):
             'sender_name': f"{self.sender.first_name} {self.sender.last_name}"
         }
 
+    def to_notification_dict(self, user_id, read):
+        """Render the broadcast as an entry in a user's notification feed.
+
+        There is no Notification row behind it, so it carries the
+        announcement_id instead of an id; mark it read with
+        POST /announcements/<announcement_id>/read.
+        """
+        return {
+            'announcement_id': self.id,
+            'user_id': user_id,
+            'title': 'New Announcement',
+            'content': f'New announcement: {self.title}',
+            'type': 'announcement',
+            'reference_id': self.id,
+            'read': read,
+            'created_at': self.created_at.isoformat()
+        }
+
+class AnnouncementRead(db.Model):
+    __tablename__ = 'announcement_read'
+    __table_args__ = (
+        db.Index('ix_announcement_read_user_announcement', 'user_id', 'announcement_id', unique=True),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    announcement_id = db.Column(db.Integer, db.ForeignKey('announcement.id'), nullable=False)
+    read_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Notification(db.Model):
+    __table_args__ = (
+        db.Index('ix_notification_user_created', 'user_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
@@ -129,6 +168,10 @@ class ChatRoom(db.Model):
         }
 
 class ChatParticipant(db.Model):
+    __table_args__ = (
+        db.Index('ix_chat_participant_user', 'user_id'),
+        db.Index('ix_chat_participant_room', 'chat_room_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     chat_room_id = db.Column(db.Integer, db.ForeignKey('chat_room.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -150,6 +193,10 @@ class ChatParticipant(db.Model):
         }
 
 class ChatMessage(db.Model):
+    __table_args__ = (
+        db.Index('ix_chat_message_room_created', 'chat_room_id', 'created_at'),
+        db.Index('ix_chat_message_room_id', 'chat_room_id', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     chat_room_id = db.Column(db.Integer, db.ForeignKey('chat_room.id'), nullable=False)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -173,3 +220,36 @@ class ChatMessage(db.Model):
             'created_at': self.created_at.isoformat(),
             'sender_name': f"{self.sender.first_name} {self.sender.last_name}"
         }
+
+class OutboundEmail(db.Model):
+    __tablename__ = 'outbound_email'
+    __table_args__ = (
+        db.Index('ix_outbound_email_status_next_attempt', 'status', 'next_attempt_at'),
+        db.Index('ix_outbound_email_claim_token', 'claim_token'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    sender = db.Column(db.String(120))
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    claim_token = db.Column(db.String(32))
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime)
+    sent_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'recipient': self.recipient,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'created_at': self.created_at.isoformat()
+        }
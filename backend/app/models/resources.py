@@ -103,7 +103,7 @@ class InventoryItem(db.Model):
 
 class InventoryTransaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    item_id = db.Column(db.Integer, db.ForeignKey('inventory_item.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('inventory_items.id'), nullable=False)
     transaction_type = db.Column(db.String(20), nullable=False)  # in, out
     quantity = db.Column(db.Integer, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -134,7 +134,7 @@ class InventoryTransaction(db.Model):
 class MaintenanceRecord(db.Model):
     __tablename__ = 'maintenance_records'
     id = db.Column(db.Integer, primary_key=True)
-    item_id = db.Column(db.Integer, db.ForeignKey('inventory_item.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('inventory_items.id'), nullable=False)
     maintenance_type = db.Column(db.String(50))  # repair, inspection, cleaning
     description = db.Column(db.Text)
     cost = db.Column(db.Float)
@@ -0,0 +1,58 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Table names whose writes bump their version counter
+_tracked_tables = set()
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_version'
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def track(*models):
+        """Bump the version of these models' tables whenever the ORM writes to them.
+
+        Bulk query.update()/delete() calls bypass the session and must call
+        TableVersion.bump() themselves.
+        """
+        for model in models:
+            _tracked_tables.add(model.__table__.name)
+
+    @staticmethod
+    def bump(connection, table_names):
+        now = datetime.utcnow()
+        table = TableVersion.__table__
+        for table_name in table_names:
+            result = connection.execute(
+                table.update()
+                .where(table.c.table_name == table_name)
+                .values(version=table.c.version + 1, updated_at=now)
+            )
+            if result.rowcount == 0:
+                connection.execute(table.insert().values(table_name=table_name, version=1, updated_at=now))
+
+    @staticmethod
+    def current(models):
+        """Map of table name to (version, updated_at) for the given models"""
+        table_names = [model.__table__.name for model in models]
+        rows = db.session.query(TableVersion).filter(TableVersion.table_name.in_(table_names)).all()
+        versions = {table_name: (0, None) for table_name in table_names}
+        versions.update({row.table_name: (row.version, row.updated_at) for row in rows})
+        return versions
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_table_versions(session, flush_context):
+    if not _tracked_tables:
+        return
+    changed = {
+        obj.__table__.name
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if getattr(obj, '__table__', None) is not None and obj.__table__.name in _tracked_tables
+    }
+    if changed:
+        TableVersion.bump(session.connection(), sorted(changed))
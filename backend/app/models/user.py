@@ -1,8 +1,11 @@
 from app import db
 from datetime import datetime
-import bcrypt
+from app.services.password_service import PasswordService
 
 class User(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_role', 'role'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
@@ -14,11 +17,13 @@ class User(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def set_password(self, password):
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt)
+        self.password_hash = PasswordService.hash(password)
 
     def check_password(self, password):
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash)
+        return PasswordService.verify(password, self.password_hash)
+
+    def password_needs_rehash(self):
+        return PasswordService.needs_rehash(self.password_hash)
 
     def to_dict(self):
         return {
@@ -31,3 +36,33 @@ class User(db.Model):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
+
+
+# Expression indexes for case-insensitive prefix search on names and emails
+db.Index('ix_user_lower_first_name', db.func.lower(User.first_name))
+db.Index('ix_user_lower_last_name', db.func.lower(User.last_name))
+db.Index('ix_user_lower_email', db.func.lower(User.email))
+
+
+class UserImport(db.Model):
+    """An uploaded user import file waiting for, or processed by, the job queue"""
+    __tablename__ = 'user_import'
+    id = db.Column(db.Integer, primary_key=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(255))  # Removed once the import has run
+    processing_status = db.Column(db.String(20), default='pending')  # pending, done, failed
+    report = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'created_by': self.created_by,
+            'filename': self.filename,
+            'processing_status': self.processing_status,
+            'report': self.report,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
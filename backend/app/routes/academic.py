@@ -1,18 +1,33 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.academic import Course, Student, Attendance, Grade, CourseEnrollment
+from app.models.academic import Course, Student, Attendance, Grade, CourseEnrollment, GradeSummary
 from app.models.user import User
+from app.services.grade_summary_service import GradeSummaryService
+from app.services.transcript_service import TranscriptService
+from app.utils.pagination import paginate, paginated_response
+from app.utils.http_cache import conditional_get
 from app import db
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 
 academic_bp = Blueprint('academic', __name__)
 
+ATTENDANCE_STATUSES = ('present', 'absent', 'late')
+
 # Course routes
 @academic_bp.route('/courses', methods=['GET'])
 @jwt_required()
+@conditional_get(Course)
 def get_courses():
-    courses = Course.query.all()
-    return jsonify([course.to_dict() for course in courses])
+    query = Course.query
+    
+    # Filter by teacher
+    teacher_id = request.args.get('teacher_id', type=int)
+    if teacher_id:
+        query = query.filter_by(teacher_id=teacher_id)
+    
+    courses, next_cursor = paginate(query, Course.code, Course.id)
+    return paginated_response([course.to_dict() for course in courses], next_cursor)
 
 @academic_bp.route('/courses', methods=['POST'])
 @jwt_required()
@@ -31,6 +46,7 @@ def create_course():
 
 @academic_bp.route('/courses/<int:course_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(Course)
 def get_course(course_id):
     course = Course.query.get_or_404(course_id)
     return jsonify(course.to_dict())
@@ -39,8 +55,15 @@ def get_course(course_id):
 @academic_bp.route('/students', methods=['GET'])
 @jwt_required()
 def get_students():
-    students = Student.query.all()
-    return jsonify([student.to_dict() for student in students])
+    query = Student.query
+    
+    # Filter by grade level
+    current_grade = request.args.get('current_grade')
+    if current_grade:
+        query = query.filter_by(current_grade=current_grade)
+    
+    students, next_cursor = paginate(query, Student.registration_number, Student.id)
+    return paginated_response([student.to_dict() for student in students], next_cursor)
 
 @academic_bp.route('/students', methods=['POST'])
 @jwt_required()
@@ -68,9 +91,88 @@ def mark_attendance():
         remarks=data.get('remarks')
     )
     db.session.add(attendance)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'Attendance already recorded for this student and date'}), 409
     return jsonify(attendance.to_dict()), 201
 
+def upsert_attendance(course_id, attendance_date, records_by_student):
+    """Insert or update one attendance row per student for a course and date"""
+    existing = {
+        attendance.student_id: attendance
+        for attendance in Attendance.query.filter(
+            Attendance.course_id == course_id,
+            Attendance.date == attendance_date,
+            Attendance.student_id.in_(records_by_student.keys())
+        )
+    }
+
+    attendances = []
+    for student_id, record in records_by_student.items():
+        attendance = existing.get(student_id)
+        if attendance is None:
+            attendance = Attendance(
+                student_id=student_id,
+                course_id=course_id,
+                date=attendance_date
+            )
+            db.session.add(attendance)
+        attendance.status = record['status']
+        attendance.remarks = record.get('remarks')
+        attendances.append(attendance)
+    return attendances
+
+@academic_bp.route('/attendance/bulk', methods=['POST'])
+@jwt_required()
+def mark_bulk_attendance():
+    data = request.get_json()
+    course_id = data['course_id']
+    attendance_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+    records = data.get('records', [])
+
+    if not records:
+        return jsonify({'error': 'No attendance records provided'}), 400
+
+    # Last entry wins if a student appears more than once in the roll call
+    records_by_student = {record['student_id']: record for record in records}
+
+    invalid_status = [
+        student_id for student_id, record in records_by_student.items()
+        if record.get('status') not in ATTENDANCE_STATUSES
+    ]
+    if invalid_status:
+        return jsonify({
+            'error': 'Invalid attendance status',
+            'student_ids': invalid_status
+        }), 400
+
+    enrolled_ids = {
+        student_id for (student_id,) in db.session.query(CourseEnrollment.student_id).filter(
+            CourseEnrollment.course_id == course_id,
+            CourseEnrollment.student_id.in_(records_by_student.keys())
+        )
+    }
+    not_enrolled = [student_id for student_id in records_by_student if student_id not in enrolled_ids]
+    if not_enrolled:
+        return jsonify({
+            'error': 'Students not enrolled in course',
+            'student_ids': not_enrolled
+        }), 400
+
+    # Upsert on (student, course, date) so resubmitting a roll call is idempotent. A
+    # concurrent submission can insert the same rows first; the unique index turns
+    # that into an IntegrityError, and the retry then updates its rows instead
+    try:
+        attendances = upsert_attendance(course_id, attendance_date, records_by_student)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        attendances = upsert_attendance(course_id, attendance_date, records_by_student)
+        db.session.commit()
+    return jsonify([attendance.to_dict() for attendance in attendances]), 201
+
 @academic_bp.route('/attendance/course/<int:course_id>/date/<date>', methods=['GET'])
 @jwt_required()
 def get_course_attendance(course_id, date):
@@ -95,9 +197,34 @@ def add_grade():
         remarks=data.get('remarks')
     )
     db.session.add(grade)
+    GradeSummaryService.record([grade])
     db.session.commit()
     return jsonify(grade.to_dict()), 201
 
+@academic_bp.route('/grades/<int:grade_id>', methods=['PUT'])
+@jwt_required()
+def update_grade(grade_id):
+    grade = Grade.query.get_or_404(grade_id)
+    data = request.get_json()
+
+    GradeSummaryService.discard(grade)
+    for field in ['assessment_type', 'score', 'max_score', 'remarks']:
+        if field in data:
+            setattr(grade, field, data[field])
+    GradeSummaryService.record([grade])
+
+    db.session.commit()
+    return jsonify(grade.to_dict())
+
+@academic_bp.route('/grades/<int:grade_id>', methods=['DELETE'])
+@jwt_required()
+def delete_grade(grade_id):
+    grade = Grade.query.get_or_404(grade_id)
+    GradeSummaryService.discard(grade)
+    db.session.delete(grade)
+    db.session.commit()
+    return '', 204
+
 @academic_bp.route('/grades/student/<int:student_id>/course/<int:course_id>', methods=['GET'])
 @jwt_required()
 def get_student_course_grades(student_id, course_id):
@@ -107,11 +234,119 @@ def get_student_course_grades(student_id, course_id):
     ).all()
     return jsonify([grade.to_dict() for grade in grades])
 
+# Gradebook routes
+@academic_bp.route('/gradebook/course/<int:course_id>', methods=['GET'])
+@jwt_required()
+def get_gradebook(course_id):
+    Course.query.get_or_404(course_id)
+
+    # grade_summary already holds one row per student x assessment cell
+    cells = GradeSummary.query.filter_by(course_id=course_id).all()
+
+    students = db.session.query(Student.id, Student.registration_number, User.first_name, User.last_name)\
+        .join(CourseEnrollment, CourseEnrollment.student_id == Student.id)\
+        .join(User, User.id == Student.user_id)\
+        .filter(CourseEnrollment.course_id == course_id)\
+        .order_by(User.last_name, User.first_name, Student.id)\
+        .all()
+
+    matrix = {}
+    assessment_types = set()
+    for cell in cells:
+        assessment_types.add(cell.assessment_type)
+        matrix.setdefault(cell.student_id, {})[cell.assessment_type] = {
+            'count': cell.count,
+            'score': cell.score_sum,
+            'max_score': cell.max_score_sum,
+            'percentage': cell.percentage
+        }
+
+    return jsonify({
+        'course_id': course_id,
+        'assessment_types': sorted(assessment_types),
+        'students': [{
+            'student_id': student.id,
+            'registration_number': student.registration_number,
+            'student_name': f"{student.first_name} {student.last_name}",
+            'grades': matrix.get(student.id, {})
+        } for student in students]
+    })
+
+@academic_bp.route('/gradebook/course/<int:course_id>', methods=['POST'])
+@jwt_required()
+def add_gradebook_entries(course_id):
+    data = request.get_json()
+    entries = data.get('grades', [])
+
+    if not entries:
+        return jsonify({'error': 'No grades provided'}), 400
+
+    errors = []
+    for index, entry in enumerate(entries):
+        score = entry.get('score')
+        max_score = entry.get('max_score')
+        if not entry.get('student_id') or not entry.get('assessment_type'):
+            errors.append({'index': index, 'error': 'student_id and assessment_type are required'})
+        elif not isinstance(score, (int, float)) or not isinstance(max_score, (int, float)):
+            errors.append({'index': index, 'error': 'score and max_score must be numbers'})
+        elif max_score <= 0 or score < 0 or score > max_score:
+            errors.append({'index': index, 'error': 'score must be between 0 and max_score'})
+
+    if not errors:
+        student_ids = {entry['student_id'] for entry in entries}
+        enrolled_ids = {
+            student_id for (student_id,) in db.session.query(CourseEnrollment.student_id).filter(
+                CourseEnrollment.course_id == course_id,
+                CourseEnrollment.student_id.in_(student_ids)
+            )
+        }
+        errors = [
+            {'index': index, 'error': 'Student not enrolled in course'}
+            for index, entry in enumerate(entries)
+            if entry['student_id'] not in enrolled_ids
+        ]
+
+    if errors:
+        return jsonify({'error': 'Invalid grades', 'details': errors}), 400
+
+    grades = [Grade(
+        student_id=entry['student_id'],
+        course_id=course_id,
+        assessment_type=entry['assessment_type'],
+        score=entry['score'],
+        max_score=entry['max_score'],
+        remarks=entry.get('remarks')
+    ) for entry in entries]
+    db.session.add_all(grades)
+    GradeSummaryService.record(grades)
+    db.session.commit()
+    return jsonify([grade.to_dict() for grade in grades]), 201
+
+# Transcript routes
+@academic_bp.route('/transcript/student/<int:student_id>', methods=['GET'])
+@jwt_required()
+def get_student_transcript(student_id):
+    Student.query.get_or_404(student_id)
+    return jsonify(TranscriptService.transcript(student_id))
+
+@academic_bp.route('/gpa/grade-level/<grade_level>', methods=['GET'])
+@jwt_required()
+def get_grade_level_gpas(grade_level):
+    return jsonify(TranscriptService.grade_level_gpas(grade_level))
+
 # Course enrollment routes
 @academic_bp.route('/enrollment', methods=['POST'])
 @jwt_required()
 def enroll_student():
     data = request.get_json()
+
+    # Check if student is already enrolled
+    if CourseEnrollment.query.filter_by(
+        student_id=data['student_id'],
+        course_id=data['course_id']
+    ).first():
+        return jsonify({'error': 'Student already enrolled in course'}), 400
+
     enrollment = CourseEnrollment(
         student_id=data['student_id'],
         course_id=data['course_id'],
@@ -119,17 +354,31 @@ def enroll_student():
     )
     db.session.add(enrollment)
     db.session.commit()
+    TranscriptService.invalidate(enrollment.student_id)
     return jsonify({'message': 'Student enrolled successfully'}), 201
 
 @academic_bp.route('/enrollment/course/<int:course_id>', methods=['GET'])
 @jwt_required()
 def get_course_enrollments(course_id):
-    enrollments = CourseEnrollment.query.filter_by(course_id=course_id).all()
+    # Students, their user names and enrollment status in one joined query
+    query = db.session.query(Student, User.first_name, User.last_name, User.email, CourseEnrollment.status)\
+        .join(CourseEnrollment, CourseEnrollment.student_id == Student.id)\
+        .join(User, User.id == Student.user_id)\
+        .filter(CourseEnrollment.course_id == course_id)
+
+    status = request.args.get('status')
+    if status:
+        query = query.filter(CourseEnrollment.status == status)
+
+    # Student.id is the cursor column, so it is selected under its own name for paginate()
+    rows, next_cursor = paginate(query.add_columns(Student.id), Student.id, Student.id)
+
     students = []
-    for enrollment in enrollments:
-        student = Student.query.get(enrollment.student_id)
-        if student:
-            student_dict = student.to_dict()
-            student_dict['enrollment_status'] = enrollment.status
-            students.append(student_dict)
-    return jsonify(students)
+    for student, first_name, last_name, email, enrollment_status, _ in rows:
+        student_dict = student.to_dict()
+        student_dict['first_name'] = first_name
+        student_dict['last_name'] = last_name
+        student_dict['email'] = email
+        student_dict['enrollment_status'] = enrollment_status
+        students.append(student_dict)
+    return paginated_response(students, next_cursor)
@@ -1,14 +1,45 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import csv
+import io
 import os
 from werkzeug.utils import secure_filename
-from app.models.assignments import Assignment, AssignmentSubmission, CourseMaterial
-from app.models.academic import Course
+from app.models.assignments import Assignment, AssignmentSubmission, CourseMaterial, UploadSession, metadata_summary
+from app.models.academic import Course, Student, CourseEnrollment
+from app.services.upload_service import UploadService, UploadError
+from app.services.blob_store import BlobStore
+from app.services.processing_service import ProcessingService
+from app.services.assignment_analytics_service import AssignmentAnalyticsService
+from app.models.user import User
+from app.utils.current_user import current_user
+from app.utils.downloads import send_stored_file
+from app.utils.zip_stream import stream_zip
 from app import db
 from datetime import datetime
 
 assignments_bp = Blueprint('assignments', __name__)
 
+def can_access_course(user, course_id):
+    """Admins and staff, the course teacher and enrolled students may see course files"""
+    if user.role in ['admin', 'staff']:
+        return True
+    if user.role == 'teacher':
+        return Course.query.filter_by(id=course_id, teacher_id=user.id).first() is not None
+    if user.role == 'student':
+        return db.session.query(CourseEnrollment.id).join(
+            Student, Student.id == CourseEnrollment.student_id
+        ).filter(
+            Student.user_id == user.id,
+            CourseEnrollment.course_id == course_id
+        ).first() is not None
+    return False
+
+def can_access_submission(user, submission):
+    """Students may only see their own work; staff go through the course check"""
+    if user.role == 'student':
+        return Student.query.filter_by(id=submission.student_id, user_id=user.id).first() is not None
+    return can_access_course(user, submission.assignment.course_id)
+
 # Assignment routes
 @assignments_bp.route('/assignments', methods=['POST'])
 @jwt_required()
@@ -33,9 +64,10 @@ def get_course_assignments(course_id):
 
 @assignments_bp.route('/assignments/<int:assignment_id>/submit', methods=['POST'])
 @jwt_required()
-def submit_assignment():
-    student_id = get_jwt_identity()
-    assignment_id = request.form.get('assignment_id')
+def submit_assignment(assignment_id):
+    student = Student.query.filter_by(user_id=get_jwt_identity()).first()
+    if not student:
+        return jsonify({'error': 'Student profile not found'}), 404
     
     if 'file' not in request.files:
         return jsonify({'error': 'No file provided'}), 400
@@ -44,20 +76,20 @@ def submit_assignment():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
         
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'assignments', filename)
-    
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    file.save(file_path)
+    file_path, file_hash = BlobStore.store_upload(file)
     
     submission = AssignmentSubmission(
         assignment_id=assignment_id,
-        student_id=student_id,
-        file_path=file_path
+        student_id=student.id,
+        file_path=file_path,
+        file_hash=file_hash,
+        original_filename=secure_filename(file.filename)
     )
     db.session.add(submission)
+    db.session.flush()
+    ProcessingService.enqueue('submission', submission)
     db.session.commit()
+    ProcessingService.notify()
     
     return jsonify(submission.to_dict()), 201
 
@@ -67,6 +99,110 @@ def get_assignment_submissions(assignment_id):
     submissions = AssignmentSubmission.query.filter_by(assignment_id=assignment_id).all()
     return jsonify([submission.to_dict() for submission in submissions])
 
+@assignments_bp.route('/assignments/<int:assignment_id>/analytics', methods=['GET'])
+@jwt_required()
+def get_assignment_analytics(assignment_id):
+    assignment = Assignment.query.get_or_404(assignment_id)
+    user = current_user()
+    if not user or user.role == 'student' or not can_access_course(user, assignment.course_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(AssignmentAnalyticsService.course_analytics(assignment.course_id, assignment.id)[0])
+
+@assignments_bp.route('/assignments/course/<int:course_id>/analytics', methods=['GET'])
+@jwt_required()
+def get_course_assignment_analytics(course_id):
+    Course.query.get_or_404(course_id)
+    user = current_user()
+    if not user or user.role == 'student' or not can_access_course(user, course_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(AssignmentAnalyticsService.course_analytics(course_id))
+
+@assignments_bp.route('/assignments/<int:assignment_id>/submissions/export', methods=['GET'])
+@jwt_required()
+def export_assignment_submissions(assignment_id):
+    assignment = Assignment.query.get_or_404(assignment_id)
+    user = current_user()
+    if not user or user.role == 'student' or not can_access_course(user, assignment.course_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    rows = db.session.query(AssignmentSubmission, Student.registration_number, User.first_name, User.last_name)\
+        .join(Student, Student.id == AssignmentSubmission.student_id)\
+        .join(User, User.id == Student.user_id)\
+        .filter(AssignmentSubmission.assignment_id == assignment_id)\
+        .order_by(Student.registration_number, AssignmentSubmission.submission_date)\
+        .all()
+
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(['registration_number', 'student_name', 'submission_id', 'submission_date',
+                     'late', 'status', 'score', 'max_score', 'feedback', 'file'])
+
+    # Everything the archive needs is read here; the generator never touches the database
+    entries = []
+    used_names = set()
+    for submission, registration_number, first_name, last_name in rows:
+        filename = submission.original_filename or os.path.basename(submission.file_path or '')
+        arcname = f'{registration_number}_{filename}'
+        if arcname in used_names:
+            arcname = f'{registration_number}_{submission.id}_{filename}'
+        used_names.add(arcname)
+
+        has_file = bool(submission.file_path) and os.path.isfile(submission.file_path)
+        if has_file:
+            entries.append((arcname, submission.file_path))
+
+        writer.writerow([
+            registration_number,
+            f'{first_name} {last_name}',
+            submission.id,
+            submission.submission_date.isoformat(),
+            submission.submission_date > assignment.due_date,
+            submission.status,
+            submission.score,
+            assignment.max_score,
+            submission.feedback,
+            arcname if has_file else ''
+        ])
+
+    entries.append(('manifest.csv', manifest.getvalue().encode('utf-8')))
+
+    return Response(
+        stream_zip(entries),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="assignment_{assignment_id}_submissions.zip"'}
+    )
+
+@assignments_bp.route('/submissions/<int:submission_id>/download', methods=['GET'])
+@jwt_required()
+def download_submission(submission_id):
+    submission = AssignmentSubmission.query.get_or_404(submission_id)
+    user = current_user()
+    if not user or not can_access_submission(user, submission):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    return send_stored_file(submission.file_path, submission.file_hash, submission.original_filename)
+
+@assignments_bp.route('/submissions/<int:submission_id>/processing', methods=['GET'])
+@jwt_required()
+def get_submission_processing(submission_id):
+    submission = AssignmentSubmission.query.get_or_404(submission_id)
+    user = current_user()
+    if not user or not can_access_submission(user, submission):
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify({
+        'processing_status': submission.processing_status,
+        'file_metadata': metadata_summary(submission.file_metadata, submission.thumbnail_url, include_text=True)
+    })
+
+@assignments_bp.route('/submissions/<int:submission_id>/thumbnail', methods=['GET'])
+@jwt_required()
+def get_submission_thumbnail(submission_id):
+    submission = AssignmentSubmission.query.get_or_404(submission_id)
+    user = current_user()
+    if not user or not can_access_submission(user, submission):
+        return jsonify({'error': 'Unauthorized'}), 403
+    return send_stored_file(BlobStore.thumbnail_path(submission.file_hash or ''), download_name='thumbnail.jpg')
+
 # Course materials routes
 @assignments_bp.route('/materials', methods=['POST'])
 @jwt_required()
@@ -78,22 +214,22 @@ def upload_material():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
         
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'materials', filename)
-    
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    file.save(file_path)
+    file_path, file_hash = BlobStore.store_upload(file)
     
     material = CourseMaterial(
         title=request.form.get('title'),
         description=request.form.get('description'),
         course_id=request.form.get('course_id'),
         file_path=file_path,
+        file_hash=file_hash,
+        original_filename=secure_filename(file.filename),
         material_type=request.form.get('material_type')
     )
     db.session.add(material)
+    db.session.flush()
+    ProcessingService.enqueue('material', material)
     db.session.commit()
+    ProcessingService.notify()
     
     return jsonify(material.to_dict()), 201
 
@@ -102,3 +238,149 @@ def upload_material():
 def get_course_materials(course_id):
     materials = CourseMaterial.query.filter_by(course_id=course_id).all()
     return jsonify([material.to_dict() for material in materials])
+
+@assignments_bp.route('/materials/<int:material_id>/download', methods=['GET'])
+@jwt_required()
+def download_material(material_id):
+    material = CourseMaterial.query.get_or_404(material_id)
+    user = current_user()
+    if not user or not can_access_course(user, material.course_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+    return send_stored_file(material.file_path, material.file_hash, material.original_filename)
+
+@assignments_bp.route('/materials/<int:material_id>/processing', methods=['GET'])
+@jwt_required()
+def get_material_processing(material_id):
+    material = CourseMaterial.query.get_or_404(material_id)
+    user = current_user()
+    if not user or not can_access_course(user, material.course_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify({
+        'processing_status': material.processing_status,
+        'file_metadata': metadata_summary(material.file_metadata, material.thumbnail_url, include_text=True)
+    })
+
+@assignments_bp.route('/materials/<int:material_id>/thumbnail', methods=['GET'])
+@jwt_required()
+def get_material_thumbnail(material_id):
+    material = CourseMaterial.query.get_or_404(material_id)
+    user = current_user()
+    if not user or not can_access_course(user, material.course_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+    return send_stored_file(BlobStore.thumbnail_path(material.file_hash or ''), download_name='thumbnail.jpg')
+
+@assignments_bp.route('/materials/<int:material_id>', methods=['DELETE'])
+@jwt_required()
+def delete_material(material_id):
+    material = CourseMaterial.query.get_or_404(material_id)
+    BlobStore.release(material.file_hash)
+    db.session.delete(material)
+    db.session.commit()
+    return '', 204
+
+# Chunked upload routes
+@assignments_bp.route('/uploads', methods=['POST'])
+@jwt_required()
+def create_upload():
+    data = request.get_json()
+    kind = data.get('kind')
+
+    if kind == 'assignment':
+        form_data = {'assignment_id': data.get('assignment_id')}
+        if not Assignment.query.get(form_data['assignment_id']):
+            return jsonify({'error': 'Assignment not found'}), 404
+        if not Student.query.filter_by(user_id=get_jwt_identity()).first():
+            return jsonify({'error': 'Student profile not found'}), 404
+    else:
+        form_data = {field: data.get(field) for field in ['title', 'description', 'course_id', 'material_type']}
+        if kind == 'material' and not (form_data['title'] and Course.query.get(form_data['course_id'])):
+            return jsonify({'error': 'A title and an existing course_id are required'}), 400
+
+    try:
+        upload = UploadService.create(get_jwt_identity(), kind, data.get('filename'), data.get('size'), form_data)
+    except UploadError as e:
+        return jsonify({'error': e.message}), e.status_code
+
+    db.session.add(upload)
+    db.session.commit()
+
+    upload_dict = upload.to_dict()
+    upload_dict['chunk_size'] = current_app.config['UPLOAD_CHUNK_SIZE']
+    return jsonify(upload_dict), 201
+
+@assignments_bp.route('/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload(upload_id):
+    upload = UploadSession.query.get_or_404(upload_id)
+    if upload.user_id != get_jwt_identity():
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(upload.to_dict())
+
+@assignments_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@jwt_required()
+def append_upload_chunk(upload_id):
+    upload = UploadSession.query.with_for_update().get_or_404(upload_id)
+    if upload.user_id != get_jwt_identity():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify({'error': 'offset is required'}), 400
+
+    # Read the raw body; the chunk is never buffered by form parsing
+    try:
+        UploadService.append(upload, offset, request.stream)
+    except UploadError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message, 'received_size': upload.received_size}), e.status_code
+
+    db.session.commit()
+    return jsonify(upload.to_dict())
+
+@assignments_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_upload(upload_id):
+    upload = UploadSession.query.with_for_update().get_or_404(upload_id)
+    if upload.user_id != get_jwt_identity():
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    # The profile was checked when the session was created, but may have gone since
+    student = None
+    if upload.kind == 'assignment':
+        student = Student.query.filter_by(user_id=upload.user_id).first()
+        if not student:
+            db.session.rollback()
+            return jsonify({'error': 'Student profile not found'}), 404
+
+    data = request.get_json(silent=True) or {}
+    try:
+        file_path = UploadService.finalize(upload, data.get('sha256'))
+    except UploadError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
+
+    if upload.kind == 'assignment':
+        record = AssignmentSubmission(
+            assignment_id=upload.form_data['assignment_id'],
+            student_id=student.id,
+            file_path=file_path,
+            file_hash=upload.sha256,
+            original_filename=secure_filename(upload.filename)
+        )
+    else:
+        record = CourseMaterial(
+            title=upload.form_data.get('title'),
+            description=upload.form_data.get('description'),
+            course_id=upload.form_data.get('course_id'),
+            file_path=file_path,
+            file_hash=upload.sha256,
+            original_filename=secure_filename(upload.filename),
+            material_type=upload.form_data.get('material_type')
+        )
+    db.session.add(record)
+    db.session.flush()
+    ProcessingService.enqueue('submission' if upload.kind == 'assignment' else 'material', record)
+    db.session.commit()
+    ProcessingService.notify()
+
+    return jsonify(record.to_dict()), 201
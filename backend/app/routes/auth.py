@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
 from app.models.user import User
+from app.utils.current_user import current_user
+from app.services.password_service import PasswordService, PasswordPoolBusy
 from app import db
 
 auth_bp = Blueprint('auth', __name__)
@@ -20,7 +22,10 @@ def register():
         last_name=data['last_name'],
         role=data['role']
     )
-    user.set_password(data['password'])
+    try:
+        user.set_password(data['password'])
+    except PasswordPoolBusy:
+        return jsonify({'error': 'Server busy, please retry'}), 503, {'Retry-After': '1'}
     
     db.session.add(user)
     db.session.commit()
@@ -32,8 +37,20 @@ def login():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
     
-    if user and user.check_password(data['password']):
-        access_token = create_access_token(identity=user.id)
+    try:
+        authenticated = user is not None and user.check_password(data['password'])
+        if authenticated and user.password_needs_rehash():
+            # Cost factor changed since this hash was made; upgrade it while we have the password
+            user.set_password(data['password'])
+            db.session.commit()
+    except PasswordPoolBusy:
+        return jsonify({'error': 'Server busy, please retry'}), 503, {'Retry-After': '1'}
+    
+    if authenticated:
+        access_token = create_access_token(identity=user.id, additional_claims={
+            'role': user.role,
+            'name': f'{user.first_name} {user.last_name}'
+        })
         return jsonify({
             'access_token': access_token,
             'user': user.to_dict()
@@ -44,10 +61,18 @@ def login():
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def profile():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_user()
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
     return jsonify(user.to_dict())
+
+@auth_bp.route('/password-pool/metrics', methods=['GET'])
+@jwt_required()
+def password_pool_metrics():
+    user = current_user()
+    if not user or user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify(PasswordService.metrics())
@@ -1,13 +1,29 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, create_access_token
 from app.models.communication import Message, Announcement, Notification, Conference, ChatRoom, ChatParticipant, ChatMessage
 from app.models.user import User
-from app import db, mail
-from flask_mail import Message as EmailMessage
+from app.utils.pagination import paginate, paginated_response
+from app.utils.current_user import current_user
+from app.services.email_outbox_service import EmailOutboxService
+from app.services.notification_feed_service import NotificationFeedService
+from app.services.unread_count_service import UnreadCountService
+from app.services.chat_hub import get_chat_hub
+from app import db, jwt
 from datetime import datetime
+from sqlalchemy.orm import joinedload
+import json
 
 communication_bp = Blueprint('communication', __name__)
 
+CHAT_STREAM_SCOPE = 'chat_stream'
+
+@jwt.token_verification_loader
+def stream_tokens_only_open_the_stream(jwt_header, jwt_data):
+    # A stream token travels in the URL, so it must not work anywhere else
+    if jwt_data.get('scope') == CHAT_STREAM_SCOPE:
+        return request.endpoint == 'communication.stream_chat'
+    return True
+
 # Message routes
 @communication_bp.route('/messages', methods=['POST'])
 @jwt_required()
@@ -20,6 +36,7 @@ def send_message():
         content=data['content']
     )
     db.session.add(message)
+    db.session.flush()
     
     # Create notification for recipient
     notification = Notification(
@@ -31,20 +48,30 @@ def send_message():
     )
     db.session.add(notification)
     db.session.commit()
+    UnreadCountService.invalidate(message.recipient_id)
     
     return jsonify(message.to_dict()), 201
 
 @communication_bp.route('/messages/inbox', methods=['GET'])
 @jwt_required()
 def get_inbox():
-    messages = Message.query.filter_by(recipient_id=get_jwt_identity()).order_by(Message.created_at.desc()).all()
-    return jsonify([message.to_dict() for message in messages])
+    query = Message.query.filter_by(recipient_id=get_jwt_identity())\
+        .options(joinedload(Message.sender), joinedload(Message.recipient))
+    
+    # Filter to unread messages
+    if request.args.get('unread_only', 'false').lower() in ['true', '1']:
+        query = query.filter_by(read=False)
+    
+    messages, next_cursor = paginate(query, Message.created_at, Message.id, descending=True)
+    return paginated_response([message.to_dict() for message in messages], next_cursor)
 
 @communication_bp.route('/messages/sent', methods=['GET'])
 @jwt_required()
 def get_sent_messages():
-    messages = Message.query.filter_by(sender_id=get_jwt_identity()).order_by(Message.created_at.desc()).all()
-    return jsonify([message.to_dict() for message in messages])
+    query = Message.query.filter_by(sender_id=get_jwt_identity())\
+        .options(joinedload(Message.sender), joinedload(Message.recipient))
+    messages, next_cursor = paginate(query, Message.created_at, Message.id, descending=True)
+    return paginated_response([message.to_dict() for message in messages], next_cursor)
 
 @communication_bp.route('/messages/<int:message_id>/read', methods=['POST'])
 @jwt_required()
@@ -55,6 +82,7 @@ def mark_message_read(message_id):
     
     message.read = True
     db.session.commit()
+    UnreadCountService.invalidate(message.recipient_id)
     return jsonify({'message': 'Message marked as read'})
 
 # Announcement routes
@@ -70,36 +98,37 @@ def create_announcement():
     )
     db.session.add(announcement)
     
-    # Create notifications for target users
-    target_users = User.query.filter_by(role=data['target_role']).all() if data['target_role'] != 'all' else User.query.all()
-    
-    for user in target_users:
-        notification = Notification(
-            user_id=user.id,
-            title='New Announcement',
-            content=f'New announcement: {data["title"]}',
-            type='announcement',
-            reference_id=announcement.id
-        )
-        db.session.add(notification)
-        
-        # Send email notification if email is configured
-        if user.email:
-            email = EmailMessage(
-                'New Announcement',
-                f'There is a new announcement: {data["title"]}\n\n{data["content"]}',
-                'noreply@school.com',
-                [user.email]
-            )
-            mail.send(email)
+    # The announcement is stored once; it appears in each target user's notifications when read
+    # Queue email notifications; the background sender delivers them
+    recipients = db.session.query(User.email).filter(User.email.isnot(None))
+    if data['target_role'] != 'all':
+        recipients = recipients.filter(User.role == data['target_role'])
+    EmailOutboxService.enqueue_select(
+        recipients,
+        'New Announcement',
+        f'There is a new announcement: {data["title"]}\n\n{data["content"]}'
+    )
     
     db.session.commit()
+    UnreadCountService.clear()
+    EmailOutboxService.notify()
     return jsonify(announcement.to_dict()), 201
 
+@communication_bp.route('/announcements/<int:announcement_id>/read', methods=['POST'])
+@jwt_required()
+def mark_announcement_read(announcement_id):
+    user = current_user()
+    if not NotificationFeedService.mark_announcement_read(user, announcement_id):
+        return jsonify({'error': 'Announcement not found'}), 404
+    
+    db.session.commit()
+    UnreadCountService.invalidate(user.id)
+    return jsonify({'message': 'Announcement marked as read'})
+
 @communication_bp.route('/announcements', methods=['GET'])
 @jwt_required()
 def get_announcements():
-    user = User.query.get(get_jwt_identity())
+    user = current_user()
     announcements = Announcement.query.filter(
         (Announcement.target_role == 'all') | 
         (Announcement.target_role == user.role)
@@ -110,19 +139,19 @@ def get_announcements():
 @communication_bp.route('/notifications', methods=['GET'])
 @jwt_required()
 def get_notifications():
-    notifications = Notification.query.filter_by(
-        user_id=get_jwt_identity()
-    ).order_by(Notification.created_at.desc()).all()
-    return jsonify([notification.to_dict() for notification in notifications])
+    # Personal notifications merged with broadcast announcements, optionally filtered by type
+    notifications, next_cursor = NotificationFeedService.page(current_user(), request.args.get('type'))
+    return paginated_response(notifications, next_cursor)
 
 @communication_bp.route('/notifications/unread', methods=['GET'])
 @jwt_required()
 def get_unread_notifications():
-    notifications = Notification.query.filter_by(
-        user_id=get_jwt_identity(),
-        read=False
-    ).order_by(Notification.created_at.desc()).all()
-    return jsonify([notification.to_dict() for notification in notifications])
+    return jsonify(NotificationFeedService.unread(current_user()))
+
+@communication_bp.route('/unread-counts', methods=['GET'])
+@jwt_required()
+def get_unread_counts():
+    return jsonify(UnreadCountService.counts(current_user()))
 
 @communication_bp.route('/notifications/<int:notification_id>/read', methods=['POST'])
 @jwt_required()
@@ -133,6 +162,7 @@ def mark_notification_read(notification_id):
     
     notification.read = True
     db.session.commit()
+    UnreadCountService.invalidate(notification.user_id)
     return jsonify({'message': 'Notification marked as read'})
 
 # Conference routes
@@ -152,6 +182,7 @@ def create_conference():
         location=data.get('location')
     )
     db.session.add(conference)
+    db.session.flush()
     
     # Create notifications for participants
     participants = [
@@ -159,6 +190,10 @@ def create_conference():
         (conference.parent_id, 'parent'),
         (conference.student_id, 'student')
     ]
+    users = {
+        user.id: user
+        for user in User.query.filter(User.id.in_([user_id for user_id, role in participants]))
+    }
     
     for user_id, role in participants:
         notification = Notification(
@@ -170,10 +205,11 @@ def create_conference():
         )
         db.session.add(notification)
         
-        # Send email notification
-        user = User.query.get(user_id)
+        # Queue email notification
+        user = users.get(user_id)
         if user and user.email:
-            email = EmailMessage(
+            EmailOutboxService.enqueue(
+                [user.email],
                 'Parent-Teacher Conference Scheduled',
                 f'''
                 A new conference has been scheduled:
@@ -186,20 +222,19 @@ def create_conference():
                 
                 Description:
                 {data.get("description", "")}
-                ''',
-                'noreply@school.com',
-                [user.email]
+                '''
             )
-            mail.send(email)
     
     db.session.commit()
+    UnreadCountService.invalidate(*[user_id for user_id, role in participants])
+    EmailOutboxService.notify()
     return jsonify(conference.to_dict()), 201
 
 @communication_bp.route('/conferences', methods=['GET'])
 @jwt_required()
 def get_conferences():
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = current_user()
     
     if user.role == 'teacher':
         conferences = Conference.query.filter_by(teacher_id=user_id).all()
@@ -245,6 +280,7 @@ def update_conference(conference_id):
             db.session.add(notification)
     
     db.session.commit()
+    UnreadCountService.invalidate(conference.teacher_id, conference.parent_id, conference.student_id)
     return jsonify(conference.to_dict())
 
 # Chat routes
@@ -307,7 +343,95 @@ def send_chat_message(room_id):
         participant.last_read_at = datetime.utcnow()
     
     db.session.commit()
-    return jsonify(message.to_dict()), 201
+    UnreadCountService.invalidate_chat_room(room_id)
+    
+    payload = message.to_dict()
+    get_chat_hub().publish(f'room:{room_id}', payload)
+    return jsonify(payload), 201
+
+@communication_bp.route('/chat/stream-token', methods=['POST'])
+@jwt_required()
+def create_chat_stream_token():
+    """Short-lived token for opening the chat stream.
+
+    EventSource cannot set headers, so the stream takes its token in the
+    query string, where access and proxy logs record it. This token only
+    opens the stream and expires after CHAT_STREAM_TOKEN_EXPIRES; fetch a
+    fresh one before every (re)connect.
+    """
+    expires = current_app.config['CHAT_STREAM_TOKEN_EXPIRES']
+    token = create_access_token(
+        identity=get_jwt_identity(),
+        expires_delta=expires,
+        additional_claims={'scope': CHAT_STREAM_SCOPE}
+    )
+    return jsonify({'stream_token': token, 'expires_in': int(expires.total_seconds())}), 201
+
+@communication_bp.route('/chat/stream', methods=['GET'])
+@jwt_required(locations=['query_string', 'headers'])
+def stream_chat():
+    """Server-Sent Events stream of new messages in the user's chat rooms.
+
+    Opened with ?jwt=<token from /chat/stream-token>; the main access token
+    is refused so it never ends up in URLs. Each event's id is the message
+    id, and anything after the Last-Event-ID header (or ?last_event_id=) is
+    replayed first. Stream tokens expire within a minute, so the browser's
+    own reconnect to the same URL fails; clients reopen the stream with a
+    fresh token and the last id they saw as last_event_id.
+    """
+    if get_jwt().get('scope') != CHAT_STREAM_SCOPE:
+        return jsonify({'error': 'A chat stream token is required'}), 401
+
+    room_ids = [
+        room_id for (room_id,) in
+        db.session.query(ChatParticipant.chat_room_id).filter_by(user_id=get_jwt_identity())
+    ]
+    requested = request.args.get('rooms')
+    if requested:
+        requested_ids = {int(room_id) for room_id in requested.split(',') if room_id.isdigit()}
+        room_ids = [room_id for room_id in room_ids if room_id in requested_ids]
+    
+    # Subscribe before reading the backlog so nothing falls between the two
+    subscription = get_chat_hub().subscribe([f'room:{room_id}' for room_id in room_ids])
+    
+    missed = []
+    last_event_id = request.headers.get('Last-Event-ID', type=int) or request.args.get('last_event_id', type=int)
+    if last_event_id and room_ids:
+        missed = [
+            message.to_dict() for message in
+            ChatMessage.query.options(joinedload(ChatMessage.sender))
+            .filter(ChatMessage.chat_room_id.in_(room_ids), ChatMessage.id > last_event_id)
+            .order_by(ChatMessage.id)
+            .limit(current_app.config['CHAT_STREAM_REPLAY_LIMIT'])
+        ]
+    
+    # The stream never touches the database again, so hand the connection back now
+    db.session.remove()
+    heartbeat = current_app.config['CHAT_STREAM_HEARTBEAT']
+    
+    def events():
+        # Live events already covered by the replay are skipped
+        replayed_up_to = missed[-1]['id'] if missed else 0
+        try:
+            yield 'retry: 3000\n\n'
+            for payload in missed:
+                yield f"id: {payload['id']}\nevent: message\ndata: {json.dumps(payload)}\n\n"
+            while not subscription.overflowed:
+                event = subscription.get(heartbeat)
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                channel, payload = event
+                if payload['id'] <= replayed_up_to:
+                    continue
+                yield f"id: {payload['id']}\nevent: message\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            subscription.close()
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 @communication_bp.route('/chat/rooms/<int:room_id>/messages', methods=['GET'])
 @jwt_required()
@@ -318,19 +442,33 @@ def get_chat_messages(room_id):
         user_id=get_jwt_identity()
     ).first_or_404()
     
-    # Get messages with pagination
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 50, type=int)
+    # Keyset pagination on message id: before_id scrolls back, after_id fetches newer messages
+    limit = request.args.get('limit', current_app.config['PAGINATION_DEFAULT_LIMIT'], type=int)
+    limit = max(1, min(limit, current_app.config['PAGINATION_MAX_LIMIT']))
+    before_id = request.args.get('before_id', type=int)
+    after_id = request.args.get('after_id', type=int)
+    
+    query = ChatMessage.query.filter_by(chat_room_id=room_id)\
+        .options(joinedload(ChatMessage.sender))
+    if after_id is not None:
+        query = query.filter(ChatMessage.id > after_id).order_by(ChatMessage.id)
+    else:
+        if before_id is not None:
+            query = query.filter(ChatMessage.id < before_id)
+        query = query.order_by(ChatMessage.id.desc())
     
-    messages = ChatMessage.query.filter_by(chat_room_id=room_id)\
-        .order_by(ChatMessage.created_at.desc())\
-        .paginate(page=page, per_page=per_page)
+    messages = query.limit(limit + 1).all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if after_id is not None:
+        messages.reverse()
     
+    # Messages are always returned newest first
     return jsonify({
-        'messages': [msg.to_dict() for msg in messages.items],
-        'total': messages.total,
-        'pages': messages.pages,
-        'current_page': messages.page
+        'messages': [msg.to_dict() for msg in messages],
+        'has_more': has_more,
+        'oldest_id': messages[-1].id if messages else None,
+        'newest_id': messages[0].id if messages else None
     })
 
 @communication_bp.route('/chat/rooms/<int:room_id>/read', methods=['POST'])
@@ -343,5 +481,6 @@ def mark_messages_read(room_id):
     
     participant.last_read_at = datetime.utcnow()
     db.session.commit()
+    UnreadCountService.invalidate(participant.user_id)
     
     return jsonify({'message': 'Messages marked as read'})
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.financial import FeeStructure, StudentFee, Payment, Invoice, InvoiceItem
 from app.models.user import User
+from app.utils.pagination import paginate, paginated_response
+from app.utils.http_cache import conditional_get
 from app import db
 from datetime import datetime
 import stripe
@@ -28,9 +30,18 @@ def create_fee_structure():
 
 @financial_bp.route('/fee-structure', methods=['GET'])
 @jwt_required()
+@conditional_get(FeeStructure)
 def get_fee_structures():
-    fee_structures = FeeStructure.query.all()
-    return jsonify([fs.to_dict() for fs in fee_structures])
+    query = FeeStructure.query
+    
+    # Optional filters
+    for field in ['category', 'academic_year', 'grade_level', 'frequency']:
+        value = request.args.get(field)
+        if value:
+            query = query.filter(getattr(FeeStructure, field) == value)
+    
+    fee_structures, next_cursor = paginate(query, FeeStructure.name, FeeStructure.id)
+    return paginated_response([fs.to_dict() for fs in fee_structures], next_cursor)
 
 # Student Fee routes
 @financial_bp.route('/student-fees/<int:student_id>', methods=['GET'])
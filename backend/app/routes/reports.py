@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.academic import Course, Student, Grade, Attendance
+from app.models.academic import Course, Student, Grade, GradeSummary, Attendance
+from app.models.user import User
 from app.models.financial import Payment, StudentFee, Invoice
 from app import db
 from sqlalchemy import func
@@ -17,27 +18,43 @@ def academic_performance_report():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    query = db.session.query(
-        Grade.student_id,
-        Student.first_name,
-        Student.last_name,
-        Course.name.label('course_name'),
-        func.avg(Grade.score).label('average_score'),
-        func.count(Grade.id).label('total_assessments')
-    ).join(Student).join(Course)
-    
-    if student_id:
-        query = query.filter(Grade.student_id == student_id)
     if start_date and end_date:
-        query = query.filter(Grade.created_at.between(
-            datetime.strptime(start_date, '%Y-%m-%d'),
-            datetime.strptime(end_date, '%Y-%m-%d')
-        ))
-    
+        # Date ranges need the raw grades; the summary only holds running totals
+        query = db.session.query(
+            Grade.student_id,
+            User.first_name,
+            User.last_name,
+            Course.name.label('course_name'),
+            func.avg(Grade.score).label('average_score'),
+            func.count(Grade.id).label('total_assessments')
+        ).join(Student, Student.id == Grade.student_id)\
+            .join(User, User.id == Student.user_id)\
+            .join(Course, Course.id == Grade.course_id)\
+            .filter(Grade.date.between(
+                datetime.strptime(start_date, '%Y-%m-%d'),
+                datetime.strptime(end_date, '%Y-%m-%d')
+            ))
+        student_column = Grade.student_id
+    else:
+        query = db.session.query(
+            GradeSummary.student_id,
+            User.first_name,
+            User.last_name,
+            Course.name.label('course_name'),
+            (func.sum(GradeSummary.score_sum) / func.sum(GradeSummary.count)).label('average_score'),
+            func.sum(GradeSummary.count).label('total_assessments')
+        ).join(Student, Student.id == GradeSummary.student_id)\
+            .join(User, User.id == Student.user_id)\
+            .join(Course, Course.id == GradeSummary.course_id)
+        student_column = GradeSummary.student_id
+
+    if student_id:
+        query = query.filter(student_column == student_id)
+
     results = query.group_by(
-        Grade.student_id,
-        Student.first_name,
-        Student.last_name,
+        student_column,
+        User.first_name,
+        User.last_name,
         Course.name
     ).all()
     
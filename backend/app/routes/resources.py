@@ -5,6 +5,7 @@ from app.models.resources import (
     MaintenanceRecord
 )
 from app.models.user import User
+from app.utils.pagination import paginate, paginated_response
 from app import db
 from datetime import datetime, timedelta
 from sqlalchemy import or_
@@ -31,8 +32,8 @@ def get_books():
     if category:
         query = query.filter_by(category=category)
     
-    books = query.all()
-    return jsonify([book.to_dict() for book in books])
+    books, next_cursor = paginate(query, Book.title, Book.id)
+    return paginated_response([book.to_dict() for book in books], next_cursor)
 
 @resources_bp.route('/books', methods=['POST'])
 @jwt_required()
@@ -113,8 +114,8 @@ def get_inventory():
     if status:
         query = query.filter_by(status=status)
     
-    items = query.all()
-    return jsonify([item.to_dict() for item in items])
+    items, next_cursor = paginate(query, InventoryItem.name, InventoryItem.id)
+    return paginated_response([item.to_dict() for item in items], next_cursor)
 
 @resources_bp.route('/inventory', methods=['POST'])
 @jwt_required()
@@ -1,15 +1,124 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.user import User
+from app.models.user import User, UserImport
+from app.utils.pagination import paginate, paginated_response
+from app.utils.current_user import current_user, invalidate_current_user
+from app.services.user_import_service import UserImportService, UserImportError, read_rows
+from app.services.processing_service import ProcessingService
 from app import db
+from sqlalchemy import func, and_, or_
 
 users_bp = Blueprint('users', __name__)
 
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+
+
+def prefix_match(column, prefix):
+    """Case-insensitive prefix filter that can use an index on lower(column).
+
+    Written as a range rather than LIKE so every backend can answer it from
+    a plain btree index regardless of collation.
+    """
+    expression = func.lower(column)
+    return and_(expression >= prefix, expression < prefix + '\uffff')
+
 @users_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users]), 200
+    query = User.query
+    
+    # Filter by role
+    role = request.args.get('role')
+    if role:
+        query = query.filter_by(role=role)
+    
+    # Filter by active flag
+    is_active = request.args.get('is_active')
+    if is_active is not None:
+        query = query.filter_by(is_active=is_active.lower() in ['true', '1'])
+    
+    users, next_cursor = paginate(query, User.last_name, User.id)
+    return paginated_response([user.to_dict() for user in users], next_cursor), 200
+
+@users_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_users():
+    terms = request.args.get('q', '').strip().lower().split()
+    if not terms:
+        return jsonify([]), 200
+    
+    if len(terms) == 1:
+        condition = or_(
+            prefix_match(User.first_name, terms[0]),
+            prefix_match(User.last_name, terms[0]),
+            prefix_match(User.email, terms[0])
+        )
+    else:
+        # "Jane Do" or "Doe Ja": first and last name in either order
+        first, last = terms[0], ' '.join(terms[1:])
+        condition = or_(
+            and_(prefix_match(User.first_name, first), prefix_match(User.last_name, last)),
+            and_(prefix_match(User.last_name, first), prefix_match(User.first_name, last))
+        )
+    
+    query = db.session.query(User.id, User.email, User.first_name, User.last_name, User.role)\
+        .filter(condition, User.is_active.is_(True))
+    role = request.args.get('role')
+    if role:
+        query = query.filter(User.role.in_(role.split(',')))
+    
+    limit = request.args.get('limit', SEARCH_DEFAULT_LIMIT, type=int)
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    rows = query.order_by(User.last_name, User.first_name, User.id).limit(limit).all()
+    return jsonify([{
+        'id': row.id,
+        'email': row.email,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'role': row.role
+    } for row in rows]), 200
+
+@users_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_users():
+    user = current_user()
+    if not user or user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file provided'}), 400
+    file = request.files['file']
+    dry_run = request.args.get('dry_run', 'false').lower() in ['true', '1']
+    
+    try:
+        # Validation hashes nothing, so a dry run of any size is answered directly
+        if dry_run:
+            report = UserImportService.run(read_rows(file.stream, file.filename), dry_run=True)
+            return jsonify(report), 200
+
+        user_import = UserImportService.save_upload(file, user.id)
+        UserImportService.check_readable(user_import)
+    except UserImportError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Hashing passwords would hold the request for as long as the file is long; queue it
+    db.session.add(user_import)
+    db.session.flush()
+    ProcessingService.enqueue('user_import', user_import)
+    db.session.commit()
+    ProcessingService.notify()
+    response = jsonify(user_import.to_dict())
+    response.headers['Location'] = url_for('users.get_user_import', import_id=user_import.id)
+    return response, 202
+
+@users_bp.route('/import/<int:import_id>', methods=['GET'])
+@jwt_required()
+def get_user_import(import_id):
+    user = current_user()
+    if not user or user.role != 'admin':
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(UserImport.query.get_or_404(import_id).to_dict()), 200
 
 @users_bp.route('/<int:user_id>', methods=['GET'])
 @jwt_required()
@@ -33,6 +142,7 @@ def update_user(user_id):
         user.role = data['role']
         
     db.session.commit()
+    invalidate_current_user(user_id)
     return jsonify(user.to_dict()), 200
 
 @users_bp.route('/<int:user_id>', methods=['DELETE'])
@@ -41,4 +151,5 @@ def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    invalidate_current_user(user_id)
     return '', 204
@@ -0,0 +1,145 @@
+from sqlalchemy import func, case, and_
+from app import db
+from app.models.academic import Student, CourseEnrollment
+from app.models.assignments import Assignment, AssignmentSubmission
+from app.models.user import User
+
+
+def _quartiles(scores):
+    """Min, Q1, median, Q3 and max of a sorted list, by linear interpolation"""
+    if not scores:
+        return {'min': None, 'q1': None, 'median': None, 'q3': None, 'max': None}
+
+    def percentile(p):
+        position = (len(scores) - 1) * p
+        lower = int(position)
+        upper = min(lower + 1, len(scores) - 1)
+        return scores[lower] + (scores[upper] - scores[lower]) * (position - lower)
+
+    return {
+        'min': scores[0],
+        'q1': percentile(0.25),
+        'median': percentile(0.5),
+        'q3': percentile(0.75),
+        'max': scores[-1]
+    }
+
+
+class AssignmentAnalyticsService:
+    @staticmethod
+    def course_analytics(course_id, assignment_id=None):
+        """Submission and grading statistics for a course's assignments.
+
+        Each figure comes from a set-based query over the whole course, so
+        the number of queries does not grow with assignments or students.
+        """
+        assignments_query = Assignment.query.filter_by(course_id=course_id)
+        if assignment_id:
+            assignments_query = assignments_query.filter_by(id=assignment_id)
+        assignments = assignments_query.order_by(Assignment.due_date, Assignment.id).all()
+        if not assignments:
+            return []
+        assignment_ids = [assignment.id for assignment in assignments]
+
+        enrolled = db.session.query(func.count(CourseEnrollment.id)).filter(
+            CourseEnrollment.course_id == course_id,
+            CourseEnrollment.status == 'active'
+        ).scalar()
+
+        # One row per (assignment, student) that submitted, with their first submission time
+        per_student = db.session.query(
+            AssignmentSubmission.assignment_id,
+            AssignmentSubmission.student_id,
+            func.min(AssignmentSubmission.submission_date).label('first_submitted'),
+            func.max(case((AssignmentSubmission.score.isnot(None), 1), else_=0)).label('graded')
+        ).filter(
+            AssignmentSubmission.assignment_id.in_(assignment_ids)
+        ).group_by(
+            AssignmentSubmission.assignment_id,
+            AssignmentSubmission.student_id
+        ).subquery()
+
+        counts = {
+            row.assignment_id: row
+            for row in db.session.query(
+                per_student.c.assignment_id,
+                func.count().label('submitted'),
+                func.sum(case((per_student.c.first_submitted <= Assignment.due_date, 1), else_=0)).label('on_time'),
+                func.sum(per_student.c.graded).label('graded')
+            ).join(Assignment, Assignment.id == per_student.c.assignment_id)
+            .group_by(per_student.c.assignment_id)
+        }
+
+        # Score statistics count each student once, by their latest graded submission,
+        # to match the per-student counts above
+        latest_graded = db.session.query(
+            func.max(AssignmentSubmission.id)
+        ).filter(
+            AssignmentSubmission.assignment_id.in_(assignment_ids),
+            AssignmentSubmission.score.isnot(None)
+        ).group_by(
+            AssignmentSubmission.assignment_id,
+            AssignmentSubmission.student_id
+        )
+
+        scores = {}
+        for scored_assignment_id, score in db.session.query(
+            AssignmentSubmission.assignment_id,
+            AssignmentSubmission.score
+        ).filter(
+            AssignmentSubmission.id.in_(latest_graded)
+        ).order_by(AssignmentSubmission.assignment_id, AssignmentSubmission.score):
+            scores.setdefault(scored_assignment_id, []).append(score)
+
+        missing = {}
+        for row in db.session.query(
+            Assignment.id.label('assignment_id'),
+            Student.id.label('student_id'),
+            Student.registration_number,
+            User.first_name,
+            User.last_name
+        ).join(CourseEnrollment, CourseEnrollment.course_id == Assignment.course_id)\
+            .join(Student, Student.id == CourseEnrollment.student_id)\
+            .join(User, User.id == Student.user_id)\
+            .outerjoin(AssignmentSubmission, and_(
+                AssignmentSubmission.assignment_id == Assignment.id,
+                AssignmentSubmission.student_id == Student.id
+            ))\
+            .filter(
+                Assignment.id.in_(assignment_ids),
+                CourseEnrollment.status == 'active',
+                AssignmentSubmission.id.is_(None)
+            )\
+            .order_by(Assignment.id, Student.registration_number):
+            missing.setdefault(row.assignment_id, []).append({
+                'student_id': row.student_id,
+                'registration_number': row.registration_number,
+                'student_name': f"{row.first_name} {row.last_name}"
+            })
+
+        results = []
+        for assignment in assignments:
+            count = counts.get(assignment.id)
+            submitted = count.submitted if count else 0
+            on_time = int(count.on_time or 0) if count else 0
+            graded = int(count.graded or 0) if count else 0
+            assignment_scores = scores.get(assignment.id, [])
+            results.append({
+                'assignment_id': assignment.id,
+                'title': assignment.title,
+                'due_date': assignment.due_date.isoformat(),
+                'max_score': assignment.max_score,
+                'enrolled': enrolled,
+                'submitted': submitted,
+                'on_time': on_time,
+                'late': submitted - on_time,
+                'missing': len(missing.get(assignment.id, [])),
+                'graded': graded,
+                'ungraded': submitted - graded,
+                'score': dict(
+                    _quartiles(assignment_scores),
+                    mean=sum(assignment_scores) / len(assignment_scores) if assignment_scores else None
+                ),
+                'missing_students': missing.get(assignment.id, [])
+            })
+        return results
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.assignments import Blob
+
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class BlobStore:
+    """Content-addressed file storage under UPLOAD_FOLDER/blobs.
+
+    Each distinct file is written once, at blobs/<aa>/<bb>/<sha256>, and a
+    reference count on its Blob row records how many submissions and
+    materials point at it. Blobs that drop to zero references are removed
+    by collect_garbage(), together with their thumbnails/<sha256>.jpg.
+    """
+
+    # Temp files of direct uploads have no upload session, so the sweep tells them apart by name
+    DIRECT_UPLOAD_PREFIX = 'direct-'
+
+    @staticmethod
+    def root():
+        return os.path.join(current_app.config['UPLOAD_FOLDER'], 'blobs')
+
+    @staticmethod
+    def path_for(sha256):
+        return os.path.join(BlobStore.root(), sha256[:2], sha256[2:4], sha256)
+
+    @staticmethod
+    def thumbnail_root():
+        return os.path.join(current_app.config['UPLOAD_FOLDER'], 'thumbnails')
+
+    @staticmethod
+    def thumbnail_path(sha256):
+        return os.path.join(BlobStore.thumbnail_root(), f'{sha256}.jpg')
+
+    @staticmethod
+    def temp_path():
+        temp_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        return os.path.join(temp_dir, f'{BlobStore.DIRECT_UPLOAD_PREFIX}{uuid.uuid4().hex}.part')
+
+    @staticmethod
+    def store_file(source_path, sha256):
+        """Move an already hashed file into the store and take a reference to it"""
+        # Take the reference first: once this transaction holds the row, the
+        # garbage collector can no longer delete it or unlink the file
+        BlobStore.acquire(sha256, os.path.getsize(source_path))
+
+        blob_path = BlobStore.path_for(sha256)
+        if os.path.exists(blob_path):
+            os.remove(source_path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(source_path, blob_path)
+            # The rename keeps the part file's mtime, which may predate the grace
+            # period; until this transaction commits only the mtime protects the file
+            os.utime(blob_path)
+        return blob_path
+
+    @staticmethod
+    def store_upload(file_storage):
+        """Stream an uploaded file to disk while hashing it, then store it"""
+        temp_path = BlobStore.temp_path()
+        hasher = hashlib.sha256()
+        with open(temp_path, 'wb') as temp_file:
+            while True:
+                buffer = file_storage.stream.read(STREAM_BUFFER_SIZE)
+                if not buffer:
+                    break
+                hasher.update(buffer)
+                temp_file.write(buffer)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+
+        sha256 = hasher.hexdigest()
+        return BlobStore.store_file(temp_path, sha256), sha256
+
+    @staticmethod
+    def acquire(sha256, size):
+        """Add one reference to a blob, creating its row on first use"""
+        blob = Blob.query.filter_by(sha256=sha256).with_for_update().first()
+        if blob is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(Blob(sha256=sha256, size=size, ref_count=1))
+                return
+            except IntegrityError:
+                # A concurrent upload of the same content created the row first
+                blob = Blob.query.filter_by(sha256=sha256).with_for_update().first()
+        blob.ref_count += 1
+
+    @staticmethod
+    def release(sha256):
+        """Drop one reference; the file itself is removed later by collect_garbage()"""
+        if not sha256:
+            return
+        blob = Blob.query.filter_by(sha256=sha256).with_for_update().first()
+        if blob and blob.ref_count > 0:
+            blob.ref_count -= 1
+
+    @staticmethod
+    def collect_garbage(grace_period=None):
+        """Delete unreferenced blobs and orphaned files older than the grace period"""
+        if grace_period is None:
+            grace_period = current_app.config['BLOB_GC_GRACE_PERIOD']
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_period)
+
+        removed = 0
+        candidates = [
+            sha256 for (sha256,) in
+            db.session.query(Blob.sha256).filter(Blob.ref_count <= 0, Blob.updated_at < cutoff)
+        ]
+        db.session.commit()
+        for sha256 in candidates:
+            # An upload of the same content may have taken a reference since the
+            # scan; the conditional delete loses to it and the file is kept
+            deleted = Blob.query.filter(
+                Blob.sha256 == sha256,
+                Blob.ref_count <= 0
+            ).delete(synchronize_session=False)
+            if deleted == 1:
+                for path in (BlobStore.path_for(sha256), BlobStore.thumbnail_path(sha256)):
+                    if os.path.exists(path):
+                        os.remove(path)
+                removed += 1
+            # Unlink before committing so a concurrent acquire, which waits on
+            # this row, finds the file gone and writes its own copy
+            db.session.commit()
+
+        # Files whose transaction never committed have no Blob row at all
+        known = {sha256 for (sha256,) in db.session.query(Blob.sha256)}
+        cutoff_timestamp = time.time() - grace_period
+        for directory, _, filenames in os.walk(BlobStore.root()):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if filename not in known and os.path.getmtime(path) < cutoff_timestamp:
+                    os.remove(path)
+                    removed += 1
+
+        # Thumbnails left behind by blobs collected before GC removed them too
+        if os.path.isdir(BlobStore.thumbnail_root()):
+            for filename in os.listdir(BlobStore.thumbnail_root()):
+                path = os.path.join(BlobStore.thumbnail_root(), filename)
+                if os.path.splitext(filename)[0] not in known and os.path.getmtime(path) < cutoff_timestamp:
+                    os.remove(path)
+        return removed
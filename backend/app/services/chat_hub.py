@@ -0,0 +1,141 @@
+import json
+import logging
+import queue
+import threading
+from collections import defaultdict
+
+try:
+    import redis
+except ImportError:  # redis is optional; without it the hub only spans one process
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+_hub = None
+
+
+class Subscription:
+    """One client's view of a set of channels, fed through a bounded queue"""
+
+    def __init__(self, hub, channels, maxsize):
+        self.hub = hub
+        self.channels = set(channels)
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize)
+
+    def put(self, channel, payload):
+        try:
+            self._queue.put_nowait((channel, payload))
+        except queue.Full:
+            # A client this far behind reconnects and replays from its Last-Event-ID
+            self.overflowed = True
+            self.hub.unsubscribe(self)
+
+    def get(self, timeout):
+        """Next (channel, payload), or None if nothing arrived within `timeout`"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class LocalBroker:
+    """Delivers straight to this process's subscribers; used when no broker URL is set"""
+
+    def start(self, hub):
+        self.hub = hub
+
+    def publish(self, channel, payload):
+        self.hub.deliver(channel, payload)
+
+
+class RedisBroker:
+    """Relays messages through Redis pub/sub so every worker process sees them"""
+
+    def __init__(self, url, prefix):
+        if redis is None:
+            raise RuntimeError('CHAT_BROKER_URL requires the redis package')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def start(self, hub):
+        self.hub = hub
+        thread = threading.Thread(target=self._listen, name='chat-broker', daemon=True)
+        thread.start()
+
+    def publish(self, channel, payload):
+        self.client.publish(self.prefix + channel, json.dumps(payload))
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + '*')
+                for message in pubsub.listen():
+                    channel = message['channel'].decode('utf-8')[len(self.prefix):]
+                    self.hub.deliver(channel, json.loads(message['data']))
+            except Exception:
+                logger.exception('Chat broker connection lost; reconnecting')
+                threading.Event().wait(1)
+
+
+class PubSubHub:
+    """In-process fan-out from channels to subscriptions.
+
+    Publishing goes through the broker, which hands each message back to
+    deliver() in every process that shares it. Subscribers hold no thread
+    of their own: they block on a queue, which under a gevent or eventlet
+    worker is a cheap greenlet wait.
+    """
+
+    def __init__(self, broker, queue_size):
+        self.broker = broker
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        broker.start(self)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels, self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def publish(self, channel, payload):
+        self.broker.publish(channel, payload)
+
+    def deliver(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(channel, payload)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({subscription for subscribers in self._subscribers.values() for subscription in subscribers})
+
+
+def init_chat_hub(app):
+    """Create this process's hub, sharing messages through CHAT_BROKER_URL when set"""
+    global _hub
+    broker_url = app.config['CHAT_BROKER_URL']
+    broker = RedisBroker(broker_url, app.config['CHAT_BROKER_PREFIX']) if broker_url else LocalBroker()
+    _hub = PubSubHub(broker, app.config['CHAT_STREAM_QUEUE_SIZE'])
+    return _hub
+
+
+def get_chat_hub():
+    return _hub
@@ -0,0 +1,201 @@
+import logging
+import smtplib
+import threading
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message as EmailMessage
+from sqlalchemy import select, literal
+from app import db, mail
+from app.models.communication import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+_sender = None
+
+
+class EmailOutboxService:
+    """Durable queue of outgoing email.
+
+    Handlers add rows to the outbound_email table inside their own
+    transaction. Background senders claim batches with a conditional
+    UPDATE, deliver each batch over a single SMTP connection, and record
+    the outcome per message. Failed messages are retried with exponential
+    backoff until EMAIL_MAX_ATTEMPTS.
+    """
+
+    @staticmethod
+    def enqueue(recipients, subject, body, sender=None):
+        """Queue one message per recipient in the current transaction"""
+        for recipient in recipients:
+            if recipient:
+                db.session.add(OutboundEmail(recipient=recipient, subject=subject, body=body, sender=sender))
+
+    @staticmethod
+    def enqueue_select(email_column_query, subject, body, sender=None):
+        """Queue a message for every address a one-column select returns, with INSERT ... SELECT"""
+        now = datetime.utcnow()
+        outbox = OutboundEmail.__table__
+        rows = select(
+            email_column_query.subquery().c[0],
+            literal(subject),
+            literal(body),
+            literal(sender),
+            literal('pending'),
+            literal(0),
+            literal(now),
+            literal(now)
+        )
+        db.session.execute(outbox.insert().from_select([
+            outbox.c.recipient,
+            outbox.c.subject,
+            outbox.c.body,
+            outbox.c.sender,
+            outbox.c.status,
+            outbox.c.attempts,
+            outbox.c.next_attempt_at,
+            outbox.c.created_at
+        ], rows))
+
+    @staticmethod
+    def notify():
+        """Wake the background sender after the enqueuing transaction commits"""
+        if _sender is not None:
+            _sender.wake()
+
+    @staticmethod
+    def claim_batch(size):
+        """Mark up to `size` due messages as sending and return them"""
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        due_ids = [
+            row_id for (row_id,) in db.session.query(OutboundEmail.id).filter(
+                OutboundEmail.status == 'pending',
+                OutboundEmail.next_attempt_at <= now
+            ).order_by(OutboundEmail.next_attempt_at, OutboundEmail.id).limit(size)
+        ]
+        if not due_ids:
+            db.session.commit()
+            return []
+
+        # Another sender may claim some of the same rows; the status check keeps each row with one winner
+        OutboundEmail.query.filter(
+            OutboundEmail.id.in_(due_ids),
+            OutboundEmail.status == 'pending'
+        ).update({
+            'status': 'sending',
+            'claim_token': token,
+            'claimed_at': now,
+            'attempts': OutboundEmail.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        return OutboundEmail.query.filter_by(claim_token=token).order_by(OutboundEmail.id).all()
+
+    @staticmethod
+    def _failed(email, error, permanent=False):
+        email.last_error = str(error)
+        email.claim_token = None
+        if permanent or email.attempts >= current_app.config['EMAIL_MAX_ATTEMPTS']:
+            email.status = 'failed'
+        else:
+            email.status = 'pending'
+            backoff = current_app.config['EMAIL_RETRY_BACKOFF'] * 2 ** (email.attempts - 1)
+            email.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff)
+
+    @staticmethod
+    def send_batch(emails):
+        """Deliver claimed messages over one SMTP connection"""
+        default_sender = current_app.config['MAIL_DEFAULT_SENDER']
+        try:
+            with mail.connect() as connection:
+                for email in emails:
+                    try:
+                        connection.send(EmailMessage(
+                            email.subject,
+                            recipients=[email.recipient],
+                            body=email.body,
+                            sender=email.sender or default_sender
+                        ))
+                    except smtplib.SMTPRecipientsRefused as e:
+                        # A 5xx for the address will not succeed on retry
+                        permanent = all(code >= 500 for code, message in e.recipients.values())
+                        logger.warning('Email %s to %s refused: %s', email.id, email.recipient, e)
+                        EmailOutboxService._failed(email, e, permanent)
+                    except Exception as e:
+                        logger.warning('Email %s to %s failed: %s', email.id, email.recipient, e)
+                        EmailOutboxService._failed(email, e)
+                    else:
+                        email.status = 'sent'
+                        email.sent_at = datetime.utcnow()
+                        email.last_error = None
+                        email.claim_token = None
+        except Exception as e:
+            # Connecting (or the connection dropping) failed; retry whatever was not sent
+            logger.warning('SMTP connection failed: %s', e)
+            for email in emails:
+                if email.status == 'sending':
+                    EmailOutboxService._failed(email, e)
+        db.session.commit()
+
+    @staticmethod
+    def requeue_stale():
+        """Return messages left sending by a crashed sender to the queue"""
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['EMAIL_SEND_TIMEOUT'])
+        requeued = OutboundEmail.query.filter(
+            OutboundEmail.status == 'sending',
+            OutboundEmail.claimed_at < cutoff
+        ).update({'status': 'pending', 'claim_token': None}, synchronize_session=False)
+        db.session.commit()
+        return requeued
+
+    @staticmethod
+    def send_pending(limit=None):
+        """Drain due messages in the current thread; returns the number attempted"""
+        batch_size = current_app.config['EMAIL_BATCH_SIZE']
+        attempted = 0
+        while limit is None or attempted < limit:
+            size = batch_size if limit is None else min(batch_size, limit - attempted)
+            emails = EmailOutboxService.claim_batch(size)
+            if not emails:
+                break
+            EmailOutboxService.send_batch(emails)
+            attempted += len(emails)
+        return attempted
+
+
+class EmailSender:
+    def __init__(self, app, poll_interval):
+        self.app = app
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='email-sender', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                try:
+                    EmailOutboxService.requeue_stale()
+                    EmailOutboxService.send_pending()
+                except Exception:
+                    logger.exception('Email sender error')
+                finally:
+                    db.session.remove()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+
+def init_email_sender(app):
+    """Start the background email sender for this process"""
+    global _sender
+    if not app.config['EMAIL_SENDER_ENABLED']:
+        return None
+    _sender = EmailSender(app, app.config['EMAIL_POLL_INTERVAL'])
+    _sender.start()
+    return _sender
@@ -0,0 +1,130 @@
+import mimetypes
+import os
+import re
+from app.services.blob_store import BlobStore
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; thumbnails are skipped without it
+    Image = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pypdf is optional; PDF text extraction is skipped without it
+    PdfReader = None
+
+STREAM_BUFFER_SIZE = 64 * 1024
+TEXT_EXTRACT_LIMIT = 64 * 1024
+THUMBNAIL_SIZE = (320, 320)
+
+# Processors run in registration order; each gets the metadata gathered so far
+_processors = []
+
+
+def register_processor(func):
+    """Add a post-upload processor: func(file_path, filename, metadata) -> dict"""
+    _processors.append(func)
+    return func
+
+
+def get_processors():
+    return list(_processors)
+
+
+_SIGNATURES = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'PK\x03\x04', 'application/zip'),
+]
+
+
+@register_processor
+def sniff_mime_type(file_path, filename, metadata):
+    with open(file_path, 'rb') as file:
+        head = file.read(512)
+
+    mime_type = None
+    for signature, signature_type in _SIGNATURES:
+        if head.startswith(signature):
+            mime_type = signature_type
+            break
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        mime_type = 'image/webp'
+    elif head[4:8] == b'ftyp':
+        mime_type = 'video/mp4'
+
+    guessed = mimetypes.guess_type(filename or '')[0]
+    if mime_type == 'application/zip' and guessed:
+        # docx, xlsx, pptx and friends are zip containers
+        mime_type = guessed
+    elif mime_type is None:
+        try:
+            head.decode('utf-8')
+            mime_type = guessed or 'text/plain'
+        except UnicodeDecodeError:
+            mime_type = guessed or 'application/octet-stream'
+
+    return {'mime_type': mime_type, 'size': os.path.getsize(file_path)}
+
+
+_PDF_PAGE = re.compile(rb'/Type\s*/Page[^s\w]')
+
+
+@register_processor
+def count_pdf_pages(file_path, filename, metadata):
+    if metadata.get('mime_type') != 'application/pdf':
+        return {}
+
+    # Stream the file, keeping a small overlap so a marker split across buffers is still seen
+    pages = 0
+    tail = b''
+    with open(file_path, 'rb') as file:
+        while True:
+            buffer = file.read(STREAM_BUFFER_SIZE)
+            if not buffer:
+                break
+            window = tail + buffer
+            pages += sum(1 for match in _PDF_PAGE.finditer(window) if match.end() > len(tail))
+            tail = window[-32:]
+    return {'page_count': pages}
+
+
+@register_processor
+def extract_text(file_path, filename, metadata):
+    mime_type = metadata.get('mime_type', '')
+    if mime_type.startswith('text/'):
+        with open(file_path, 'rb') as file:
+            text = file.read(TEXT_EXTRACT_LIMIT).decode('utf-8', errors='ignore')
+        return {'text': text}
+
+    if mime_type == 'application/pdf' and PdfReader is not None:
+        text = []
+        length = 0
+        for page in PdfReader(file_path).pages:
+            page_text = page.extract_text() or ''
+            text.append(page_text)
+            length += len(page_text)
+            if length >= TEXT_EXTRACT_LIMIT:
+                break
+        return {'text': '\n'.join(text)[:TEXT_EXTRACT_LIMIT]}
+
+    return {}
+
+
+@register_processor
+def make_thumbnail(file_path, filename, metadata):
+    if Image is None or not metadata.get('mime_type', '').startswith('image/'):
+        return {}
+
+    # Blob file names are content hashes, so one thumbnail serves every copy
+    # and garbage collection removes it with the blob
+    thumbnail_path = BlobStore.thumbnail_path(os.path.basename(file_path))
+    if not os.path.exists(thumbnail_path):
+        os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+        with Image.open(file_path) as image:
+            image.thumbnail(THUMBNAIL_SIZE)
+            image.convert('RGB').save(thumbnail_path, 'JPEG')
+    return {'thumbnail': True}
@@ -0,0 +1,132 @@
+from sqlalchemy import func
+from app import db
+from app.models.academic import Grade, GradeSummary
+from app.models.table_version import TableVersion
+from app.services.transcript_service import TranscriptService
+
+
+class GradeSummaryService:
+    """Keeps grade_summary in step with the raw Grade rows.
+
+    Callers invoke these inside the transaction that writes the grades, so
+    the summary is committed (or rolled back) together with them.
+    """
+
+    @staticmethod
+    def _get_for_update(student_id, course_id, assessment_type):
+        return GradeSummary.query.filter_by(
+            student_id=student_id,
+            course_id=course_id,
+            assessment_type=assessment_type
+        ).with_for_update().first()
+
+    @staticmethod
+    def record(grades):
+        """Add new grades to their summaries"""
+        deltas = {}
+        for grade in grades:
+            key = (grade.student_id, grade.course_id, grade.assessment_type)
+            deltas.setdefault(key, []).append(grade)
+
+        for (student_id, course_id, assessment_type), key_grades in deltas.items():
+            TranscriptService.invalidate_on_commit(student_id)
+            summary = GradeSummaryService._get_for_update(student_id, course_id, assessment_type)
+            if summary is None:
+                summary = GradeSummary(
+                    student_id=student_id,
+                    course_id=course_id,
+                    assessment_type=assessment_type,
+                    count=0,
+                    score_sum=0,
+                    score_sq_sum=0,
+                    max_score_sum=0
+                )
+                db.session.add(summary)
+
+            scores = [grade.score for grade in key_grades]
+            summary.count += len(key_grades)
+            summary.score_sum += sum(scores)
+            summary.score_sq_sum += sum(score * score for score in scores)
+            summary.max_score_sum += sum(grade.max_score for grade in key_grades)
+            summary.score_min = min(scores) if summary.score_min is None else min(summary.score_min, *scores)
+            summary.score_max = max(scores) if summary.score_max is None else max(summary.score_max, *scores)
+
+    @staticmethod
+    def discard(grade):
+        """Remove a grade from its summary; call before editing or deleting it"""
+        TranscriptService.invalidate_on_commit(grade.student_id)
+        summary = GradeSummaryService._get_for_update(grade.student_id, grade.course_id, grade.assessment_type)
+        if summary is None:
+            return
+
+        if summary.count <= 1:
+            db.session.delete(summary)
+            return
+
+        summary.count -= 1
+        summary.score_sum -= grade.score
+        summary.score_sq_sum -= grade.score * grade.score
+        summary.max_score_sum -= grade.max_score
+
+        # Min and max cannot be decremented, so re-read them for this key only
+        if grade.score <= summary.score_min or grade.score >= summary.score_max:
+            summary.score_min, summary.score_max = db.session.query(
+                func.min(Grade.score),
+                func.max(Grade.score)
+            ).filter(
+                Grade.student_id == grade.student_id,
+                Grade.course_id == grade.course_id,
+                Grade.assessment_type == grade.assessment_type,
+                Grade.id != grade.id
+            ).one()
+
+    @staticmethod
+    def _raw_aggregates():
+        return db.session.query(
+            Grade.student_id,
+            Grade.course_id,
+            Grade.assessment_type,
+            func.count(Grade.id).label('count'),
+            func.sum(Grade.score).label('score_sum'),
+            func.sum(Grade.score * Grade.score).label('score_sq_sum'),
+            func.sum(Grade.max_score).label('max_score_sum'),
+            func.min(Grade.score).label('score_min'),
+            func.max(Grade.score).label('score_max')
+        ).group_by(
+            Grade.student_id,
+            Grade.course_id,
+            Grade.assessment_type
+        )
+
+    @staticmethod
+    def rebuild():
+        """Recompute every summary row from the raw grades"""
+        GradeSummary.query.delete()
+        rows = GradeSummaryService._raw_aggregates().all()
+        db.session.bulk_insert_mappings(GradeSummary, [row._asdict() for row in rows])
+        # Bulk writes skip the flush listener, so retire cached transcripts here
+        TableVersion.bump(db.session.connection(), [GradeSummary.__table__.name])
+        db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def verify(tolerance=1e-6):
+        """Compare the summary with the raw grades and return the mismatched keys"""
+        expected = {
+            (row.student_id, row.course_id, row.assessment_type): row
+            for row in GradeSummaryService._raw_aggregates()
+        }
+        actual = {
+            (summary.student_id, summary.course_id, summary.assessment_type): summary
+            for summary in GradeSummary.query
+        }
+
+        fields = ('count', 'score_sum', 'score_sq_sum', 'max_score_sum', 'score_min', 'score_max')
+        mismatches = []
+        for key in expected.keys() | actual.keys():
+            raw, summary = expected.get(key), actual.get(key)
+            if raw is None or summary is None:
+                mismatches.append(key)
+            elif any(abs((getattr(raw, field) or 0) - (getattr(summary, field) or 0)) > tolerance for field in fields):
+                mismatches.append(key)
+        return sorted(mismatches)
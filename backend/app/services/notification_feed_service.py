@@ -0,0 +1,112 @@
+from sqlalchemy import func, select, literal, union_all, and_, or_
+from app import db
+from app.models.communication import Announcement, AnnouncementRead, Notification
+from app.utils.pagination import paginate
+
+
+class NotificationFeedService:
+    """A user's notifications merged with the broadcasts addressed to them.
+
+    Broadcast announcements are stored once and fanned out when read:
+    personal Notification rows and matching Announcement rows are combined
+    with UNION ALL, and per-user AnnouncementRead markers supply the read
+    flag. Feed ids are 2 * notification.id and 2 * announcement.id + 1 so
+    the merged rows have a unique key for keyset pagination; each rendered
+    entry carries its feed_id for clients that need one key for both kinds.
+    """
+
+    @staticmethod
+    def _broadcast_condition(user):
+        # Users only see broadcasts sent since they joined, as with the old per-user rows
+        return and_(
+            or_(Announcement.target_role == 'all', Announcement.target_role == user.role),
+            Announcement.created_at >= user.created_at
+        )
+
+    @staticmethod
+    def _feed(user, notification_type=None, unread_only=False):
+        personal = select(
+            (Notification.id * 2).label('feed_id'),
+            Notification.created_at.label('created_at')
+        ).where(Notification.user_id == user.id)
+        if notification_type:
+            personal = personal.where(Notification.type == notification_type)
+        if unread_only:
+            personal = personal.where(Notification.read.is_(False))
+
+        branches = [personal]
+        if notification_type in (None, 'announcement'):
+            broadcast = select(
+                (Announcement.id * 2 + 1).label('feed_id'),
+                Announcement.created_at.label('created_at')
+            ).where(NotificationFeedService._broadcast_condition(user))
+            if unread_only:
+                broadcast = broadcast.where(~select(literal(1)).where(
+                    AnnouncementRead.announcement_id == Announcement.id,
+                    AnnouncementRead.user_id == user.id
+                ).exists())
+            branches.append(broadcast)
+
+        return union_all(*branches).subquery('feed')
+
+    @staticmethod
+    def _render(user, feed_ids):
+        """Load the rows behind a page of feed ids, keeping the page order"""
+        notification_ids = [feed_id // 2 for feed_id in feed_ids if feed_id % 2 == 0]
+        announcement_ids = [feed_id // 2 for feed_id in feed_ids if feed_id % 2 == 1]
+
+        rendered = {}
+        if notification_ids:
+            for notification in Notification.query.filter(Notification.id.in_(notification_ids)):
+                rendered[notification.id * 2] = dict(notification.to_dict(), feed_id=notification.id * 2)
+        if announcement_ids:
+            read_ids = {
+                announcement_id for (announcement_id,) in
+                db.session.query(AnnouncementRead.announcement_id).filter(
+                    AnnouncementRead.user_id == user.id,
+                    AnnouncementRead.announcement_id.in_(announcement_ids)
+                )
+            }
+            for announcement in Announcement.query.filter(Announcement.id.in_(announcement_ids)):
+                rendered[announcement.id * 2 + 1] = dict(announcement.to_notification_dict(
+                    user.id, announcement.id in read_ids
+                ), feed_id=announcement.id * 2 + 1)
+        return [rendered[feed_id] for feed_id in feed_ids if feed_id in rendered]
+
+    @staticmethod
+    def page(user, notification_type=None):
+        """One keyset page of the feed, newest first, from the request's after/limit args"""
+        feed = NotificationFeedService._feed(user, notification_type)
+        rows, next_cursor = paginate(
+            db.session.query(feed.c.feed_id, feed.c.created_at),
+            feed.c.created_at,
+            feed.c.feed_id,
+            descending=True
+        )
+        return NotificationFeedService._render(user, [row.feed_id for row in rows]), next_cursor
+
+    @staticmethod
+    def unread(user):
+        feed = NotificationFeedService._feed(user, unread_only=True)
+        rows = db.session.query(feed.c.feed_id)\
+            .order_by(feed.c.created_at.desc(), feed.c.feed_id.desc()).all()
+        return NotificationFeedService._render(user, [row.feed_id for row in rows])
+
+    @staticmethod
+    def unread_count(user):
+        feed = NotificationFeedService._feed(user, unread_only=True)
+        return db.session.query(func.count()).select_from(feed).scalar()
+
+    @staticmethod
+    def mark_announcement_read(user, announcement_id):
+        """Record that the user has read a broadcast; returns False if it is not theirs"""
+        announcement = Announcement.query.filter(
+            Announcement.id == announcement_id,
+            NotificationFeedService._broadcast_condition(user)
+        ).first()
+        if announcement is None:
+            return False
+        exists = AnnouncementRead.query.filter_by(user_id=user.id, announcement_id=announcement_id).first()
+        if exists is None:
+            db.session.add(AnnouncementRead(user_id=user.id, announcement_id=announcement_id))
+        return True
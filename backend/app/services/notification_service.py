@@ -1,21 +1,16 @@
 from datetime import datetime, timedelta
-from flask_mail import Message
 from flask import current_app
-from app import db, mail
+from app import db
 from app.models.resources import BookLending, InventoryItem
 from app.models.user import User
 from app.models.communication import Notification
+from app.services.email_outbox_service import EmailOutboxService
 
 class NotificationService:
     @staticmethod
     def send_email(subject, recipients, body):
-        """Send email notification"""
-        msg = Message(
-            subject,
-            recipients=recipients,
-            body=body
-        )
-        mail.send(msg)
+        """Queue email notification; it is sent once the caller commits"""
+        EmailOutboxService.enqueue(recipients, subject, body)
 
     @staticmethod
     def check_overdue_books():
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+from flask import current_app
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_slots = None
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    'submitted': 0,
+    'completed': 0,
+    'rejected': 0,
+    'timed_out': 0,
+    'in_flight': 0,
+    'peak_in_flight': 0,
+    'total_wait_seconds': 0.0
+}
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing pool is saturated; callers should answer 503"""
+
+
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_password(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def _record(**changes):
+    with _metrics_lock:
+        for key, value in changes.items():
+            _metrics[key] += value
+        _metrics['peak_in_flight'] = max(_metrics['peak_in_flight'], _metrics['in_flight'])
+
+
+class PasswordService:
+    """bcrypt hashing and verification off the request thread.
+
+    Work runs in a per-process ProcessPoolExecutor of BCRYPT_POOL_SIZE
+    workers. At most BCRYPT_MAX_PENDING calls may be queued or running at
+    once; beyond that, calls fail immediately with PasswordPoolBusy instead
+    of tying up a request worker. A pool size of 0 hashes inline.
+    """
+
+    @staticmethod
+    def _executor():
+        global _pool, _pool_pid, _slots
+        # A pool inherited across fork is unusable, so each worker process builds its own
+        if _pool is None or _pool_pid != os.getpid():
+            with _pool_lock:
+                if _pool is None or _pool_pid != os.getpid():
+                    _pool = ProcessPoolExecutor(max_workers=current_app.config['BCRYPT_POOL_SIZE'])
+                    _pool_pid = os.getpid()
+                    _slots = threading.BoundedSemaphore(current_app.config['BCRYPT_MAX_PENDING'])
+        return _pool
+
+    @staticmethod
+    def _run(func, *args):
+        if current_app.config['BCRYPT_POOL_SIZE'] <= 0:
+            return func(*args)
+
+        executor = PasswordService._executor()
+        slots = _slots
+        if not slots.acquire(blocking=False):
+            _record(rejected=1)
+            raise PasswordPoolBusy()
+
+        _record(submitted=1, in_flight=1)
+        started = time.monotonic()
+
+        def finished(future):
+            # A job the caller gave up on still holds its slot until the pool is done with it
+            slots.release()
+            _record(completed=1, in_flight=-1, total_wait_seconds=time.monotonic() - started)
+
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            finished(None)
+            raise
+        future.add_done_callback(finished)
+
+        try:
+            return future.result(timeout=current_app.config['BCRYPT_TIMEOUT'])
+        except FutureTimeoutError:
+            # Drop it if it has not started; otherwise it runs out and then frees the slot
+            future.cancel()
+            _record(timed_out=1)
+            raise PasswordPoolBusy()
+
+    @staticmethod
+    def hash(password):
+        return PasswordService._run(_hash_password, password, current_app.config['BCRYPT_ROUNDS'])
+
+    @staticmethod
+    def hash_many(passwords, executor=None):
+        """Hash a batch of passwords, spread over `executor` when one is given.
+
+        Bulk jobs bring their own executor so they do not compete with logins
+        for the shared pool's slots.
+        """
+        rounds = current_app.config['BCRYPT_ROUNDS']
+        if executor is None:
+            return [_hash_password(password, rounds) for password in passwords]
+        return list(executor.map(_hash_password, passwords, [rounds] * len(passwords), chunksize=16))
+
+    @staticmethod
+    def verify(password, password_hash):
+        if not password_hash:
+            return False
+        if isinstance(password_hash, bytes):
+            password_hash = password_hash.decode('utf-8')
+        return PasswordService._run(_check_password, password, password_hash)
+
+    @staticmethod
+    def needs_rehash(password_hash):
+        """True when a hash was made with a different cost than BCRYPT_ROUNDS"""
+        if isinstance(password_hash, bytes):
+            password_hash = password_hash.decode('utf-8')
+        try:
+            rounds = int(password_hash.split('$')[2])
+        except (AttributeError, IndexError, ValueError):
+            return True
+        return rounds != current_app.config['BCRYPT_ROUNDS']
+
+    @staticmethod
+    def metrics():
+        with _metrics_lock:
+            snapshot = dict(_metrics)
+        completed = snapshot['completed']
+        snapshot['average_wait_seconds'] = snapshot['total_wait_seconds'] / completed if completed else 0.0
+        snapshot['pool_size'] = current_app.config['BCRYPT_POOL_SIZE']
+        snapshot['max_pending'] = current_app.config['BCRYPT_MAX_PENDING']
+        snapshot['rounds'] = current_app.config['BCRYPT_ROUNDS']
+        snapshot['pid'] = os.getpid()
+        return snapshot
@@ -0,0 +1,176 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.assignments import AssignmentSubmission, CourseMaterial, ProcessingJob
+from app.models.user import UserImport
+from app.services.file_processors import get_processors
+from app.services.user_import_service import UserImportService
+
+logger = logging.getLogger(__name__)
+
+ITEM_MODELS = {
+    'submission': AssignmentSubmission,
+    'material': CourseMaterial,
+    'user_import': UserImport
+}
+
+_worker_pool = None
+
+
+class ProcessingService:
+    """Durable queue of post-upload processing work.
+
+    Besides file metadata for submissions and materials, the queue runs
+    uploaded user imports. Jobs live in the processing_job table, so
+    anything enqueued survives a restart. Workers claim a job with a
+    conditional UPDATE, so several threads or processes can drain the same
+    table without running a job twice.
+    """
+
+    @staticmethod
+    def enqueue(item_type, item):
+        """Queue processing for a flushed submission, material or user import"""
+        item.processing_status = 'pending'
+        db.session.add(ProcessingJob(item_type=item_type, item_id=item.id))
+
+    @staticmethod
+    def notify():
+        """Wake the in-process workers after the enqueuing transaction commits"""
+        if _worker_pool is not None:
+            _worker_pool.wake()
+
+    @staticmethod
+    def claim_next():
+        """Atomically move the oldest pending job to running and return its id"""
+        while True:
+            job = ProcessingJob.query.filter_by(status='pending')\
+                .order_by(ProcessingJob.created_at, ProcessingJob.id).first()
+            if job is None:
+                db.session.commit()
+                return None
+            claimed = ProcessingJob.query.filter_by(id=job.id, status='pending').update({
+                'status': 'running',
+                'started_at': datetime.utcnow(),
+                'attempts': ProcessingJob.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return job.id
+
+    @staticmethod
+    def run_job(job_id):
+        job = ProcessingJob.query.get(job_id)
+        item = ITEM_MODELS[job.item_type].query.get(job.item_id)
+        if item is None:
+            job.status = 'done'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            return
+
+        try:
+            if job.item_type == 'user_import':
+                # Imports commit batch by batch, so they record their own outcome and are never retried
+                UserImportService.run_saved(item)
+            else:
+                ProcessingService._extract_metadata(item)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Processing job %s failed', job_id)
+            job.error = str(e)
+            if job.attempts >= current_app.config['PROCESSING_MAX_ATTEMPTS']:
+                job.status = 'failed'
+                job.finished_at = datetime.utcnow()
+                item.processing_status = 'failed'
+            else:
+                job.status = 'pending'
+            db.session.commit()
+            return
+
+        job.status = 'done'
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    @staticmethod
+    def _extract_metadata(item):
+        metadata = {}
+        if item.file_path:
+            for processor in get_processors():
+                metadata.update(processor(item.file_path, item.original_filename, metadata) or {})
+        item.file_metadata = metadata
+        item.processing_status = 'done'
+
+    @staticmethod
+    def requeue_stale():
+        """Return jobs left running by a crashed worker to the queue"""
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['PROCESSING_JOB_TIMEOUT'])
+        requeued = ProcessingJob.query.filter(
+            ProcessingJob.status == 'running',
+            ProcessingJob.started_at < cutoff
+        ).update({'status': 'pending'}, synchronize_session=False)
+        db.session.commit()
+        return requeued
+
+    @staticmethod
+    def process_pending(limit=None):
+        """Drain the queue in the current thread; returns the number of jobs run"""
+        processed = 0
+        while limit is None or processed < limit:
+            job_id = ProcessingService.claim_next()
+            if job_id is None:
+                break
+            ProcessingService.run_job(job_id)
+            processed += 1
+        return processed
+
+
+class ProcessingWorkerPool:
+    def __init__(self, app, size, poll_interval):
+        self.app = app
+        self.size = size
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.size):
+            thread = threading.Thread(target=self._run, name=f'processing-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        with self.app.app_context():
+            ProcessingService.requeue_stale()
+            while True:
+                try:
+                    job_id = ProcessingService.claim_next()
+                    if job_id is None:
+                        ProcessingService.requeue_stale()
+                        self._wake.wait(self.poll_interval)
+                        self._wake.clear()
+                        continue
+                    ProcessingService.run_job(job_id)
+                except Exception:
+                    logger.exception('Processing worker error')
+                    self._wake.wait(self.poll_interval)
+                finally:
+                    db.session.remove()
+
+
+def init_processing_workers(app):
+    """Start the background processing pool for this process"""
+    global _worker_pool
+    if app.config['PROCESSING_WORKERS'] <= 0:
+        return None
+    _worker_pool = ProcessingWorkerPool(
+        app,
+        app.config['PROCESSING_WORKERS'],
+        app.config['PROCESSING_POLL_INTERVAL']
+    )
+    _worker_pool.start()
+    return _worker_pool
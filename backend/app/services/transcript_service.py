@@ -0,0 +1,186 @@
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models.academic import Course, Student, CourseEnrollment, GradeSummary
+from app.models.table_version import TableVersion
+from app.utils.cache import TTLCache
+
+# Tables a transcript is built from; entries are stored with their version
+# counters, so a commit in any worker retires every process's stale entries
+_TRANSCRIPT_MODELS = (Course, CourseEnrollment, GradeSummary)
+TableVersion.track(*_TRANSCRIPT_MODELS)
+
+_transcript_cache = None
+
+
+def _get_cache():
+    global _transcript_cache
+    if _transcript_cache is None:
+        _transcript_cache = TTLCache(ttl=current_app.config['TRANSCRIPT_CACHE_TTL'])
+    return _transcript_cache
+
+
+def _source_versions():
+    return tuple(version for _, (version, _) in sorted(TableVersion.current(_TRANSCRIPT_MODELS).items()))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_transcripts(session):
+    for student_id in session.info.pop('transcript_invalidations', ()):
+        TranscriptService.invalidate(student_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_transcripts(session):
+    session.info.pop('transcript_invalidations', None)
+
+
+class TranscriptService:
+    @staticmethod
+    def academic_period(date):
+        """Academic year label such as "2024-2025" for a date"""
+        start_month = current_app.config['ACADEMIC_YEAR_START_MONTH']
+        year = date.year if date.month >= start_month else date.year - 1
+        return f'{year}-{year + 1}'
+
+    @staticmethod
+    def letter_grade(percentage):
+        """Letter and grade points for a course percentage"""
+        for threshold, letter, points in current_app.config['GRADE_SCALE']:
+            if percentage >= threshold:
+                return letter, points
+        return current_app.config['GRADE_SCALE'][-1][1:]
+
+    @staticmethod
+    def _rows(student_filter):
+        return db.session.query(
+            CourseEnrollment.student_id,
+            CourseEnrollment.enrollment_date,
+            CourseEnrollment.status,
+            Course.id.label('course_id'),
+            Course.code,
+            Course.name,
+            Course.credits,
+            GradeSummary.assessment_type,
+            GradeSummary.score_sum,
+            GradeSummary.max_score_sum
+        ).join(Course, Course.id == CourseEnrollment.course_id)\
+            .outerjoin(GradeSummary, (GradeSummary.student_id == CourseEnrollment.student_id) &
+                       (GradeSummary.course_id == CourseEnrollment.course_id))\
+            .filter(student_filter)\
+            .all()
+
+    @staticmethod
+    def _build(student_id, rows):
+        weights = current_app.config['GRADE_WEIGHTS']
+        default_weight = current_app.config['DEFAULT_GRADE_WEIGHT']
+
+        courses = {}
+        for row in rows:
+            course = courses.setdefault(row.course_id, {
+                'course_id': row.course_id,
+                'code': row.code,
+                'name': row.name,
+                'credits': row.credits,
+                'status': row.status,
+                'period': TranscriptService.academic_period(row.enrollment_date),
+                'weighted': 0.0,
+                'weight_total': 0.0
+            })
+            if row.assessment_type and row.max_score_sum:
+                weight = weights.get(row.assessment_type, default_weight)
+                course['weighted'] += weight * row.score_sum / row.max_score_sum * 100
+                course['weight_total'] += weight
+
+        periods = {}
+        for course in courses.values():
+            weight_total = course.pop('weight_total')
+            weighted = course.pop('weighted')
+            if weight_total:
+                course['percentage'] = round(weighted / weight_total, 2)
+                course['letter_grade'], course['grade_points'] = TranscriptService.letter_grade(course['percentage'])
+            else:
+                course['percentage'] = course['letter_grade'] = course['grade_points'] = None
+            periods.setdefault(course['period'], []).append(course)
+
+        def gpa(period_courses):
+            graded = [c for c in period_courses if c['grade_points'] is not None and c['status'] != 'dropped']
+            credits = sum(c['credits'] for c in graded)
+            if not credits:
+                return None, 0
+            return round(sum(c['grade_points'] * c['credits'] for c in graded) / credits, 2), credits
+
+        transcript_periods = []
+        for period in sorted(periods):
+            period_gpa, credits = gpa(periods[period])
+            transcript_periods.append({
+                'period': period,
+                'gpa': period_gpa,
+                'credits': credits,
+                'courses': sorted(periods[period], key=lambda c: c['code'])
+            })
+
+        cumulative_gpa, total_credits = gpa(list(courses.values()))
+        return {
+            'student_id': student_id,
+            'periods': transcript_periods,
+            'cumulative_gpa': cumulative_gpa,
+            'total_credits': total_credits
+        }
+
+    @staticmethod
+    def transcript(student_id):
+        """Transcript for one student, memoized until their grades change"""
+        # Read the versions before the rows: a commit landing in between then
+        # caches newer rows under the older versions instead of the reverse
+        versions = _source_versions()
+        cache = _get_cache()
+        cached_versions, transcript = cache.get(student_id, (None, None))
+        if cached_versions != versions:
+            rows = TranscriptService._rows(CourseEnrollment.student_id == student_id)
+            transcript = TranscriptService._build(student_id, rows)
+            cache.set(student_id, (versions, transcript))
+        return transcript
+
+    @staticmethod
+    def grade_level_gpas(grade_level):
+        """Cumulative GPA and class rank for every student in a grade level"""
+        versions = _source_versions()
+        rows = TranscriptService._rows(CourseEnrollment.student_id.in_(
+            db.session.query(Student.id).filter(Student.current_grade == grade_level)
+        ))
+
+        rows_by_student = {}
+        for row in rows:
+            rows_by_student.setdefault(row.student_id, []).append(row)
+
+        cache = _get_cache()
+        results = []
+        for student_id, student_rows in rows_by_student.items():
+            transcript = TranscriptService._build(student_id, student_rows)
+            cache.set(student_id, (versions, transcript))
+            results.append({
+                'student_id': student_id,
+                'cumulative_gpa': transcript['cumulative_gpa'],
+                'total_credits': transcript['total_credits']
+            })
+
+        results.sort(key=lambda r: (r['cumulative_gpa'] is None, -(r['cumulative_gpa'] or 0)))
+        previous_gpa, rank = None, 0
+        for position, result in enumerate(results, start=1):
+            if result['cumulative_gpa'] != previous_gpa:
+                rank, previous_gpa = position, result['cumulative_gpa']
+            result['rank'] = rank if result['cumulative_gpa'] is not None else None
+        return results
+
+    @staticmethod
+    def invalidate(student_id):
+        """Drop a student's memoized transcript from this process"""
+        if _transcript_cache is not None:
+            _transcript_cache.invalidate(student_id)
+
+    @staticmethod
+    def invalidate_on_commit(student_id):
+        """Drop a student's memoized transcript once the current transaction commits"""
+        db.session.info.setdefault('transcript_invalidations', set()).add(student_id)
@@ -0,0 +1,80 @@
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models.communication import Message, ChatMessage, ChatParticipant
+from app.services.notification_feed_service import NotificationFeedService
+from app.utils.cache import TTLCache
+
+_counts_cache = None
+
+
+def _get_cache():
+    global _counts_cache
+    if _counts_cache is None:
+        _counts_cache = TTLCache(
+            ttl=current_app.config['UNREAD_COUNT_CACHE_TTL'],
+            maxsize=current_app.config['UNREAD_COUNT_CACHE_SIZE']
+        )
+    return _counts_cache
+
+
+class UnreadCountService:
+    """Per-user unread badges, cached briefly and dropped by the writes that change them"""
+
+    @staticmethod
+    def _compute(user):
+        notifications = NotificationFeedService.unread_count(user)
+
+        messages = db.session.query(func.count(Message.id)).filter(
+            Message.recipient_id == user.id,
+            Message.read.is_(False)
+        ).scalar()
+
+        chat_rooms = dict(
+            db.session.query(ChatParticipant.chat_room_id, func.count(ChatMessage.id))
+            .join(ChatMessage, ChatMessage.chat_room_id == ChatParticipant.chat_room_id)
+            .filter(
+                ChatParticipant.user_id == user.id,
+                ChatMessage.created_at > ChatParticipant.last_read_at,
+                ChatMessage.sender_id != user.id
+            )
+            .group_by(ChatParticipant.chat_room_id)
+        )
+
+        return {
+            'notifications': notifications,
+            'messages': messages,
+            'chat_rooms': {str(room_id): count for room_id, count in chat_rooms.items()},
+            'chat': sum(chat_rooms.values()),
+            'total': notifications + messages + sum(chat_rooms.values())
+        }
+
+    @staticmethod
+    def counts(user):
+        cache = _get_cache()
+        counts = cache.get(user.id)
+        if counts is None:
+            counts = UnreadCountService._compute(user)
+            cache.set(user.id, counts)
+        return counts
+
+    @staticmethod
+    def invalidate(*user_ids):
+        if _counts_cache is not None:
+            for user_id in user_ids:
+                _counts_cache.invalidate(user_id)
+
+    @staticmethod
+    def invalidate_chat_room(room_id):
+        """Drop the counts of everyone in a chat room after a new message"""
+        if _counts_cache is not None:
+            UnreadCountService.invalidate(*[
+                user_id for (user_id,) in
+                db.session.query(ChatParticipant.user_id).filter_by(chat_room_id=room_id)
+            ])
+
+    @staticmethod
+    def clear():
+        """Drop every cached count, e.g. after a broadcast announcement"""
+        if _counts_cache is not None:
+            _counts_cache.clear()
@@ -0,0 +1,212 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_, and_
+from werkzeug.utils import secure_filename
+from app import db
+from app.models.assignments import UploadSession
+from app.services.blob_store import BlobStore
+
+UPLOAD_KINDS = ('assignment', 'material')
+STREAM_BUFFER_SIZE = 64 * 1024
+
+# Running SHA-256 per upload id, with the offset it has hashed up to and when it was last used
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class UploadService:
+    """Chunked, resumable uploads streamed straight to disk.
+
+    A client creates an upload session, appends chunks at the offset the
+    server reports, and finalizes once every byte has arrived. Chunks are
+    copied from the request stream in small buffers, so memory use does not
+    depend on the chunk or file size. Sessions expire UPLOAD_SESSION_TTL
+    seconds after their last chunk and are swept by expire_sessions().
+    """
+
+    @staticmethod
+    def part_path(upload_id):
+        return os.path.join(UploadService.temp_dir(), f'{upload_id}.part')
+
+    @staticmethod
+    def temp_dir():
+        return os.path.join(current_app.config['UPLOAD_FOLDER'], 'tmp')
+
+    @staticmethod
+    def _expiry():
+        return datetime.utcnow() + timedelta(seconds=current_app.config['UPLOAD_SESSION_TTL'])
+
+    @staticmethod
+    def create(user_id, kind, filename, total_size, form_data=None):
+        """Open a new upload session and its empty part file"""
+        if kind not in UPLOAD_KINDS:
+            raise UploadError('Invalid upload kind')
+        if not secure_filename(filename or ''):
+            raise UploadError('Invalid filename')
+        if not isinstance(total_size, int) or total_size <= 0:
+            raise UploadError('Invalid file size')
+        if total_size > current_app.config['CHUNKED_UPLOAD_MAX_SIZE'][kind]:
+            raise UploadError('File too large', 413)
+
+        upload = UploadSession(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            kind=kind,
+            filename=filename,
+            total_size=total_size,
+            received_size=0,
+            form_data=form_data or {},
+            expires_at=UploadService._expiry()
+        )
+        part_path = UploadService.part_path(upload.id)
+        os.makedirs(os.path.dirname(part_path), exist_ok=True)
+        open(part_path, 'wb').close()
+        return upload
+
+    @staticmethod
+    def _hasher(upload):
+        with _hashers_lock:
+            entry = _hashers.pop(upload.id, None)
+        if entry and entry[1] == upload.received_size:
+            return entry[0]
+
+        # Another worker or a restart handled the earlier chunks: re-hash them from disk
+        hasher = hashlib.sha256()
+        remaining = upload.received_size
+        with open(UploadService.part_path(upload.id), 'rb') as part:
+            while remaining:
+                buffer = part.read(min(STREAM_BUFFER_SIZE, remaining))
+                if not buffer:
+                    break
+                hasher.update(buffer)
+                remaining -= len(buffer)
+        return hasher
+
+    @staticmethod
+    def append(upload, offset, stream):
+        """Write one chunk from a stream at the given offset"""
+        if upload.status != 'uploading':
+            raise UploadError('Upload already finalized', 409)
+        if upload.expires_at and upload.expires_at < datetime.utcnow():
+            raise UploadError('Upload session expired', 410)
+        if offset != upload.received_size:
+            raise UploadError(f'Expected offset {upload.received_size}', 409)
+
+        hasher = UploadService._hasher(upload)
+        written = 0
+        with open(UploadService.part_path(upload.id), 'r+b') as part:
+            # Drop any bytes left over from a chunk that was never acknowledged
+            part.seek(offset)
+            part.truncate()
+            while True:
+                buffer = stream.read(STREAM_BUFFER_SIZE)
+                if not buffer:
+                    break
+                if offset + written + len(buffer) > upload.total_size:
+                    raise UploadError('Chunk exceeds declared file size')
+                part.write(buffer)
+                hasher.update(buffer)
+                written += len(buffer)
+            part.flush()
+            os.fsync(part.fileno())
+
+        upload.received_size = offset + written
+        upload.expires_at = UploadService._expiry()
+        now = time.time()
+        with _hashers_lock:
+            _hashers[upload.id] = (hasher, upload.received_size, now)
+            # Uploads abandoned mid-way never reach finalize, so drop their state here
+            idle_cutoff = now - current_app.config['UPLOAD_SESSION_TTL']
+            for upload_id in [key for key, entry in _hashers.items() if entry[2] < idle_cutoff]:
+                del _hashers[upload_id]
+        return written
+
+    @staticmethod
+    def finalize(upload, expected_sha256=None):
+        """Verify a fully received upload and move it into the blob store"""
+        if upload.status != 'uploading':
+            raise UploadError('Upload already finalized', 409)
+        if upload.expires_at and upload.expires_at < datetime.utcnow():
+            raise UploadError('Upload session expired', 410)
+        if upload.received_size != upload.total_size:
+            raise UploadError(f'Upload incomplete: {upload.received_size} of {upload.total_size} bytes', 409)
+
+        sha256 = UploadService._hasher(upload).hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise UploadError('Checksum mismatch', 422)
+
+        file_path = BlobStore.store_file(UploadService.part_path(upload.id), sha256)
+
+        upload.sha256 = sha256
+        upload.status = 'completed'
+        return file_path
+
+    @staticmethod
+    def expire_sessions(grace_period=None):
+        """Delete expired upload sessions, their part files and any orphaned temp files.
+
+        A session's part file is only removed with the expired session, never
+        by age, so a slow finalize keeps its file. Part files whose session
+        row is gone are removed straight away; files left by a crash during a
+        direct upload have no session, and are removed once they are older
+        than the grace period. Returns (sessions, files) removed.
+        """
+        if grace_period is None:
+            grace_period = current_app.config['BLOB_GC_GRACE_PERIOD']
+        now = datetime.utcnow()
+        # Sessions from before expires_at existed fall back to their last update.
+        # Rows locked by a chunk or finalize in progress are left for the next run
+        expired = UploadSession.query.filter(or_(
+            UploadSession.expires_at < now,
+            and_(
+                UploadSession.expires_at.is_(None),
+                UploadSession.updated_at < now - timedelta(seconds=current_app.config['UPLOAD_SESSION_TTL'])
+            )
+        )).with_for_update(skip_locked=True).all()
+
+        files_removed = 0
+        for upload in expired:
+            part_path = UploadService.part_path(upload.id)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+                files_removed += 1
+            with _hashers_lock:
+                _hashers.pop(upload.id, None)
+            db.session.delete(upload)
+        db.session.commit()
+
+        temp_dir = UploadService.temp_dir()
+        if not os.path.isdir(temp_dir):
+            return len(expired), files_removed
+
+        # List before reading the sessions: a part file is only written once its
+        # session row is committed, so every listed file's session is visible below
+        filenames = os.listdir(temp_dir)
+        sessions = {f'{upload_id}.part' for (upload_id,) in db.session.query(UploadSession.id)}
+        db.session.commit()
+        cutoff_timestamp = time.time() - grace_period
+        for filename in filenames:
+            path = os.path.join(temp_dir, filename)
+            if filename in sessions:
+                continue
+            if filename.startswith(BlobStore.DIRECT_UPLOAD_PREFIX) and os.path.getmtime(path) >= cutoff_timestamp:
+                continue
+            try:
+                os.remove(path)
+                files_removed += 1
+            except FileNotFoundError:
+                # A direct upload finished and moved its file since the listing
+                pass
+        return len(expired), files_removed
@@ -0,0 +1,264 @@
+import csv
+import io
+import logging
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func
+from werkzeug.utils import secure_filename
+from app import db
+from app.models.user import User, UserImport
+from app.models.academic import Student
+from app.services.password_service import PasswordService
+
+try:
+    from openpyxl import load_workbook
+except ImportError:  # openpyxl is optional; only CSV imports are accepted without it
+    load_workbook = None
+
+logger = logging.getLogger(__name__)
+
+USER_ROLES = ('admin', 'teacher', 'student', 'parent', 'staff')
+REQUIRED_FIELDS = ('email', 'first_name', 'last_name', 'role', 'password')
+FIELD_LENGTHS = {'email': 120, 'first_name': 50, 'last_name': 50, 'registration_number': 20, 'current_grade': 10}
+
+
+class UserImportError(Exception):
+    """Raised when an import file cannot be read at all"""
+
+
+def _csv_rows(stream):
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        yield row
+
+
+def _xlsx_rows(stream):
+    if load_workbook is None:
+        raise UserImportError('XLSX imports require openpyxl')
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = [str(cell).strip() if cell is not None else '' for cell in next(rows, [])]
+    for values in rows:
+        yield {
+            name: '' if value is None else str(value)
+            for name, value in zip(header, values) if name
+        }
+    workbook.close()
+
+
+def read_rows(stream, filename):
+    """Iterate an uploaded CSV or XLSX file as dicts without loading it whole"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.xlsx':
+        return _xlsx_rows(stream)
+    if extension in ('.csv', ''):
+        return _csv_rows(stream)
+    raise UserImportError(f'Unsupported file type: {extension}')
+
+
+class UserImportService:
+    """Bulk creation of users and student profiles from a spreadsheet.
+
+    Rows are validated and processed in batches of IMPORT_BATCH_SIZE: one
+    query finds emails and registration numbers that already exist,
+    passwords are hashed across a process pool, and the User and Student
+    rows are written with bulk inserts and committed per batch. Uploads are
+    saved and run by the processing queue, never inside the request.
+    """
+
+    @staticmethod
+    def _clean(row):
+        return {
+            key.strip().lower(): (value or '').strip()
+            for key, value in row.items() if isinstance(key, str)
+        }
+
+    @staticmethod
+    def _validate(row, seen_emails, seen_registrations):
+        errors = []
+        for field in REQUIRED_FIELDS:
+            if not row.get(field):
+                errors.append(f'{field} is required')
+        for field, length in FIELD_LENGTHS.items():
+            if len(row.get(field, '')) > length:
+                errors.append(f'{field} is longer than {length} characters')
+
+        email = row.get('email', '').lower()
+        if email and '@' not in email:
+            errors.append('email is invalid')
+        elif email in seen_emails:
+            errors.append('email is duplicated in this file')
+
+        role = row.get('role', '').lower()
+        if role and role not in USER_ROLES:
+            errors.append(f'role must be one of {", ".join(USER_ROLES)}')
+
+        registration_number = row.get('registration_number', '')
+        if role == 'student':
+            if not registration_number:
+                errors.append('registration_number is required for students')
+            elif registration_number in seen_registrations:
+                errors.append('registration_number is duplicated in this file')
+        return errors
+
+    @staticmethod
+    def _process_batch(batch, executor, dry_run, report):
+        emails = [row['email'].lower() for row_number, row in batch]
+        registrations = [row['registration_number'] for row_number, row in batch if row['role'].lower() == 'student']
+
+        existing_emails = {
+            email.lower() for (email,) in
+            db.session.query(User.email).filter(func.lower(User.email).in_(emails))
+        }
+        existing_registrations = {
+            number for (number,) in
+            db.session.query(Student.registration_number).filter(Student.registration_number.in_(registrations))
+        } if registrations else set()
+
+        accepted = []
+        for row_number, row in batch:
+            errors = []
+            if row['email'].lower() in existing_emails:
+                errors.append('email is already registered')
+            if row['role'].lower() == 'student' and row['registration_number'] in existing_registrations:
+                errors.append('registration_number already exists')
+            if errors:
+                report['errors'].append({'row': row_number, 'email': row['email'], 'errors': errors})
+            else:
+                accepted.append(row)
+
+        if dry_run or not accepted:
+            report['created'] += len(accepted)
+            return
+
+        password_hashes = PasswordService.hash_many([row['password'] for row in accepted], executor)
+        now = datetime.utcnow()
+        db.session.bulk_insert_mappings(User, [
+            {
+                'email': row['email'].lower(),
+                'password_hash': password_hash,
+                'first_name': row['first_name'],
+                'last_name': row['last_name'],
+                'role': row['role'].lower(),
+                'is_active': True,
+                'created_at': now,
+                'updated_at': now
+            }
+            for row, password_hash in zip(accepted, password_hashes)
+        ])
+
+        students = [row for row in accepted if row['role'].lower() == 'student']
+        if students:
+            user_ids = dict(
+                db.session.query(User.email, User.id)
+                .filter(User.email.in_([row['email'].lower() for row in students]))
+            )
+            db.session.bulk_insert_mappings(Student, [
+                {
+                    'user_id': user_ids[row['email'].lower()],
+                    'registration_number': row['registration_number'],
+                    'current_grade': row.get('current_grade') or None,
+                    'admission_date': now
+                }
+                for row in students
+            ])
+
+        db.session.commit()
+        report['created'] += len(accepted)
+        report['students_created'] += len(students)
+
+    @staticmethod
+    def run(rows, dry_run=False, workers=None):
+        """Import an iterable of row dicts and return a per-row report"""
+        batch_size = current_app.config['IMPORT_BATCH_SIZE']
+        if workers is None:
+            workers = current_app.config['IMPORT_HASH_WORKERS']
+
+        report = {'dry_run': dry_run, 'total': 0, 'created': 0, 'students_created': 0, 'errors': []}
+        seen_emails = set()
+        seen_registrations = set()
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 and not dry_run else None
+        try:
+            batch = []
+            # Row 1 is the header, so data rows are numbered from 2 as in a spreadsheet
+            for row_number, raw in enumerate(rows, start=2):
+                row = UserImportService._clean(raw)
+                if not any(row.values()):
+                    continue
+                report['total'] += 1
+
+                errors = UserImportService._validate(row, seen_emails, seen_registrations)
+                if row.get('email'):
+                    seen_emails.add(row['email'].lower())
+                if row.get('role', '').lower() == 'student' and row.get('registration_number'):
+                    seen_registrations.add(row['registration_number'])
+                if errors:
+                    report['errors'].append({'row': row_number, 'email': row.get('email'), 'errors': errors})
+                    continue
+
+                batch.append((row_number, row))
+                if len(batch) >= batch_size:
+                    UserImportService._process_batch(batch, executor, dry_run, report)
+                    batch = []
+
+            if batch:
+                UserImportService._process_batch(batch, executor, dry_run, report)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        report['errors'].sort(key=lambda error: error['row'])
+        report['failed'] = len(report['errors'])
+        return report
+
+    @staticmethod
+    def save_upload(file_storage, user_id):
+        """Write an uploaded file under UPLOAD_FOLDER/imports and record it"""
+        filename = secure_filename(file_storage.filename or '') or 'import.csv'
+        import_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'imports')
+        os.makedirs(import_dir, exist_ok=True)
+        file_path = os.path.join(import_dir, f'{uuid.uuid4().hex}{os.path.splitext(filename)[1]}')
+        file_storage.save(file_path)
+        return UserImport(created_by=user_id, filename=filename, file_path=file_path)
+
+    @staticmethod
+    def check_readable(user_import):
+        """Read the first row so a file of the wrong type or encoding is refused with the upload"""
+        try:
+            with open(user_import.file_path, 'rb') as stream:
+                next(read_rows(stream, user_import.filename), None)
+        except Exception:
+            # An unreadable file is never queued, so nothing else would remove it
+            os.remove(user_import.file_path)
+            raise
+
+    @staticmethod
+    def run_saved(user_import):
+        """Import a saved file for a processing worker and record the outcome.
+
+        Batches are committed as they go, so a failure part-way is recorded
+        on the import rather than retried. Passwords are hashed in a process
+        pool of IMPORT_HASH_WORKERS, so the worker thread only waits on it.
+        The file, which holds plain-text passwords, is always removed.
+        """
+        try:
+            with open(user_import.file_path, 'rb') as stream:
+                report = UserImportService.run(read_rows(stream, user_import.filename))
+            status = 'done'
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('User import %s failed', user_import.id)
+            report = {'error': str(e)}
+            status = 'failed'
+        finally:
+            if user_import.file_path and os.path.exists(user_import.file_path):
+                os.remove(user_import.file_path)
+
+        user_import.file_path = None
+        user_import.report = report
+        user_import.processing_status = status
+        user_import.finished_at = datetime.utcnow()
+        return report
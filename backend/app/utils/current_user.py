@@ -0,0 +1,47 @@
+from flask import current_app, g
+from flask_jwt_extended import get_jwt_identity
+from app import db
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+_user_cache = None
+
+
+def _get_cache():
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = TTLCache(ttl=current_app.config['USER_CACHE_TTL'], maxsize=current_app.config['USER_CACHE_SIZE'])
+    return _user_cache
+
+
+def current_user():
+    """The authenticated User, loaded at most once per request.
+
+    Detached copies are kept in a short-lived process-local cache and merged
+    into the request's session without a query. Returns None if the token's
+    user no longer exists.
+    """
+    if '_current_user' in g:
+        return g._current_user
+
+    user_id = get_jwt_identity()
+    cache = _get_cache()
+    cached = cache.get(user_id)
+    if cached is None:
+        user = User.query.get(user_id)
+        if user is not None:
+            # Cache a detached copy so the request's own instance stays in its session
+            db.session.expunge(user)
+            cache.set(user_id, user)
+            user = db.session.merge(user, load=False)
+    else:
+        user = db.session.merge(cached, load=False)
+
+    g._current_user = user
+    return user
+
+
+def invalidate_current_user(user_id):
+    """Drop a cached user after their record changes"""
+    if _user_cache is not None:
+        _user_cache.invalidate(user_id)
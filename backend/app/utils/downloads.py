@@ -0,0 +1,43 @@
+import mimetypes
+import os
+from flask import current_app, request, send_file, make_response, jsonify
+
+
+def send_stored_file(file_path, file_hash=None, download_name=None):
+    """Serve a stored upload with Range, ETag and If-None-Match support.
+
+    When DOWNLOAD_ACCEL_REDIRECT_PREFIX is set the body is handed to nginx
+    through X-Accel-Redirect. With USE_X_SENDFILE, send_file emits an
+    X-Sendfile header for Apache/lighttpd. Otherwise the file is returned
+    through wsgi.file_wrapper, which gunicorn serves with sendfile().
+    """
+    if not file_path or not os.path.isfile(file_path):
+        return jsonify({'error': 'File not found'}), 404
+
+    download_name = download_name or os.path.basename(file_path)
+    mimetype = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+    accel_prefix = current_app.config.get('DOWNLOAD_ACCEL_REDIRECT_PREFIX')
+    if accel_prefix:
+        if file_hash and file_hash in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            relative_path = os.path.relpath(file_path, current_app.config['UPLOAD_FOLDER'])
+            response = make_response('')
+            response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{relative_path}"
+            response.headers['Content-Type'] = mimetype
+            response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        if file_hash:
+            response.set_etag(file_hash)
+    else:
+        response = send_file(
+            file_path,
+            mimetype=mimetype,
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=file_hash or True
+        )
+
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
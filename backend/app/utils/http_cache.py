@@ -0,0 +1,45 @@
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from app.models.table_version import TableVersion
+
+
+def conditional_get(*models):
+    """Serve ETag/Last-Modified for a GET route backed by the given models.
+
+    The validators come from the models' table version counters, so a
+    request whose If-None-Match (or If-Modified-Since) still matches gets a
+    304 before the view runs and the rows are never queried. Place it below
+    @jwt_required() so authentication still happens first.
+    """
+    TableVersion.track(*models)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = TableVersion.current(models)
+            signature = '|'.join(
+                [request.path, request.query_string.decode('utf-8')] +
+                [f'{table_name}:{version}' for table_name, (version, _) in sorted(versions.items())]
+            )
+            etag = hashlib.sha1(signature.encode('utf-8')).hexdigest()
+            timestamps = [updated_at for _, updated_at in versions.values() if updated_at]
+            last_modified = max(timestamps).replace(microsecond=0) if timestamps else None
+
+            if request.if_none_match:
+                not_modified = etag in request.if_none_match
+            else:
+                not_modified = bool(
+                    last_modified and request.if_modified_since and
+                    last_modified <= request.if_modified_since.replace(tzinfo=None)
+                )
+
+            response = make_response('', 304) if not_modified else make_response(view(*args, **kwargs))
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+                if last_modified:
+                    response.last_modified = last_modified
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,79 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import request, jsonify, abort, current_app, make_response
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(sort_value, row_id):
+    """Opaque cursor for the row that ends a page"""
+    if isinstance(sort_value, (datetime, date)):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def decode_cursor(cursor, sort_column):
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        python_type = sort_column.type.python_type
+        if sort_value is not None and python_type in (datetime, date):
+            sort_value = python_type.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError, NotImplementedError):
+        abort(make_response(jsonify({'error': 'Invalid cursor'}), 400))
+
+
+def paginate(query, sort_column, id_column, descending=False):
+    """Apply keyset pagination to a query from the request's after/limit args.
+
+    Rows are ordered by (sort_column, id_column) and the page following the
+    `after` cursor is returned along with the cursor for the next page, or
+    None when this is the last one. `limit` defaults to
+    PAGINATION_DEFAULT_LIMIT and is capped at PAGINATION_MAX_LIMIT.
+
+    Requests that pass neither `after` nor `limit` come from clients written
+    before these endpoints were paginated, so they still get every row.
+    """
+    after = request.args.get('after')
+    if not after and 'limit' not in request.args:
+        if descending:
+            return query.order_by(sort_column.desc(), id_column.desc()).all(), None
+        return query.order_by(sort_column, id_column).all(), None
+
+    limit = request.args.get('limit', current_app.config['PAGINATION_DEFAULT_LIMIT'], type=int)
+    limit = max(1, min(limit, current_app.config['PAGINATION_MAX_LIMIT']))
+
+    if after:
+        sort_value, last_id = decode_cursor(after, sort_column)
+        if descending:
+            query = query.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, id_column > last_id)
+            ))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column, id_column)
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+
+def paginated_response(items, next_cursor):
+    """JSON list response with the next page's cursor in X-Next-Cursor"""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
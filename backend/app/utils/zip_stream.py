@@ -0,0 +1,64 @@
+import os
+import time
+import zipfile
+
+STREAM_BUFFER_SIZE = 64 * 1024
+
+# Formats that are already compressed; deflating them again only burns CPU
+STORED_EXTENSIONS = {
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic',
+    '.zip', '.gz', '.7z', '.rar', '.docx', '.xlsx', '.pptx',
+    '.mp3', '.mp4', '.m4a', '.mov', '.avi', '.mkv'
+}
+
+
+class _StreamBuffer:
+    """Write-only file object that hands written bytes back to the generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries):
+    """Yield a ZIP archive built on the fly from (arcname, source) pairs.
+
+    A source is either a path on disk, read in small buffers, or bytes.
+    Entries whose extension is already compressed are stored rather than
+    deflated. Memory use is bounded by the read buffer, not the file sizes.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        for arcname, source in entries:
+            extension = os.path.splitext(arcname)[1].lower()
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+            with archive.open(info, 'w', force_zip64=True) as entry:
+                if isinstance(source, bytes):
+                    entry.write(source)
+                else:
+                    with open(source, 'rb') as source_file:
+                        while True:
+                            data = source_file.read(STREAM_BUFFER_SIZE)
+                            if not data:
+                                break
+                            entry.write(data)
+                            chunk = buffer.drain()
+                            if chunk:
+                                yield chunk
+            chunk = buffer.drain()
+            if chunk:
+                yield chunk
+    yield buffer.drain()
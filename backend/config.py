@@ -14,7 +14,72 @@ class Config:
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'noreply@school.com'
+    
+    # Outgoing email queue; for local testing run `flask mail-sink` and point MAIL_SERVER/MAIL_PORT at it
+    EMAIL_SENDER_ENABLED = os.environ.get('EMAIL_SENDER_ENABLED', 'true').lower() in ['true', 'on', '1']
+    EMAIL_BATCH_SIZE = 50  # messages sent per SMTP connection
+    EMAIL_POLL_INTERVAL = 10  # seconds between idle outbox polls
+    EMAIL_MAX_ATTEMPTS = 5
+    EMAIL_RETRY_BACKOFF = 60  # seconds before the first retry; doubles on each attempt
+    EMAIL_SEND_TIMEOUT = 10 * 60  # seconds before a claimed batch is considered abandoned
     
     # File upload settings
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max request size
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Chunk size advertised for resumable uploads
+    CHUNKED_UPLOAD_MAX_SIZE = {
+        'assignment': 1024 * 1024 * 1024,  # 1GB for video and project submissions
+        'material': 2 * 1024 * 1024 * 1024  # 2GB for lecture recordings
+    }
+    BLOB_GC_GRACE_PERIOD = 60 * 60  # seconds an unreferenced blob is kept before deletion
+    UPLOAD_SESSION_TTL = 24 * 60 * 60  # seconds an idle chunked upload is kept before it is swept
+    
+    # File download offloading: X-Accel-Redirect location for nginx, or X-Sendfile
+    DOWNLOAD_ACCEL_REDIRECT_PREFIX = os.environ.get('DOWNLOAD_ACCEL_REDIRECT_PREFIX')
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() in ['true', 'on', '1']
+    
+    # Password hashing: bcrypt runs in a per-process pool, shedding load when it is full
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS') or 12)  # existing hashes are upgraded on login
+    BCRYPT_POOL_SIZE = int(os.environ.get('BCRYPT_POOL_SIZE') or 2)  # 0 hashes on the request thread
+    BCRYPT_MAX_PENDING = int(os.environ.get('BCRYPT_MAX_PENDING') or 32)  # queued + running before 503
+    BCRYPT_TIMEOUT = 5  # seconds to wait for a pooled hash before giving up
+    
+    # Authenticated user lookups are cached per process; edits through the users API invalidate them
+    USER_CACHE_TTL = 60  # seconds
+    USER_CACHE_SIZE = 4096
+    
+    # Bulk user import
+    IMPORT_BATCH_SIZE = 500  # rows validated, hashed and inserted per transaction
+    IMPORT_HASH_WORKERS = int(os.environ.get('IMPORT_HASH_WORKERS') or os.cpu_count() or 1)  # flask import-users and queued uploads
+    
+    # Unread badge counts; other worker processes may lag by up to the TTL
+    UNREAD_COUNT_CACHE_TTL = 15  # seconds
+    UNREAD_COUNT_CACHE_SIZE = 10000
+    
+    # Chat push over Server-Sent Events. Each open stream parks a worker, so production serves
+    # them from the gevent server in gunicorn.stream.conf.py, which needs the broker to see
+    # messages posted to the API server
+    CHAT_BROKER_URL = os.environ.get('CHAT_BROKER_URL')  # e.g. redis://localhost:6379/0 to share across processes
+    CHAT_BROKER_PREFIX = 'chat:'
+    CHAT_STREAM_HEARTBEAT = 25  # seconds between keep-alive comments
+    CHAT_STREAM_QUEUE_SIZE = 100  # undelivered events per stream before it is dropped
+    CHAT_STREAM_REPLAY_LIMIT = 200  # missed messages replayed on reconnect
+    CHAT_STREAM_TOKEN_EXPIRES = timedelta(minutes=1)  # stream tokens only need to outlive the connect
+    
+    # Pagination settings
+    PAGINATION_DEFAULT_LIMIT = 50
+    PAGINATION_MAX_LIMIT = 200
+    
+    # Post-upload processing queue
+    PROCESSING_WORKERS = int(os.environ.get('PROCESSING_WORKERS') or 2)  # 0 disables the in-process pool
+    PROCESSING_POLL_INTERVAL = 5  # seconds between idle queue polls
+    PROCESSING_MAX_ATTEMPTS = 3
+    PROCESSING_JOB_TIMEOUT = 10 * 60  # seconds before a running job is considered abandoned
+    
+    # Transcript and GPA settings
+    ACADEMIC_YEAR_START_MONTH = 9  # Academic years run September to August
+    GRADE_WEIGHTS = {'exam': 0.5, 'assignment': 0.3, 'project': 0.2}
+    DEFAULT_GRADE_WEIGHT = 0.1  # Weight for assessment types not listed above
+    GRADE_SCALE = [(90, 'A', 4.0), (80, 'B', 3.0), (70, 'C', 2.0), (60, 'D', 1.0), (0, 'F', 0.0)]
+    TRANSCRIPT_CACHE_TTL = 300  # seconds
@@ -0,0 +1,14 @@
+"""API server settings, read by `gunicorn run:app` when started from backend/.
+
+Chat streams (/api/communication/chat/stream) are long-lived and run on a
+separate gevent server configured in gunicorn.stream.conf.py; the proxy
+routes that one path there and everything else here.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.environ.get('GUNICORN_THREADS') or 4)
+timeout = 60
@@ -0,0 +1,24 @@
+"""Chat stream server settings: `gunicorn -c gunicorn.stream.conf.py run:app`.
+
+Serves only /api/communication/chat/stream. The gevent worker class holds
+each open stream as a greenlet, so a worker keeps thousands of idle streams
+instead of one per process or thread.
+"""
+import multiprocessing
+import os
+
+# Messages are posted to the API server, a different process, and only reach
+# these workers through the shared broker
+if not os.environ.get('CHAT_BROKER_URL'):
+    raise RuntimeError('The chat stream server requires CHAT_BROKER_URL (e.g. redis://localhost:6379/0)')
+
+# Greenlets share one OS thread, so CPU-heavy background work stays on the API server
+os.environ.setdefault('PROCESSING_WORKERS', '0')
+
+bind = os.environ.get('GUNICORN_STREAM_BIND', '0.0.0.0:8001')
+worker_class = 'gevent'
+workers = int(os.environ.get('GUNICORN_STREAM_WORKERS') or multiprocessing.cpu_count())
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS') or 2000)
+
+# Streams send a heartbeat every CHAT_STREAM_HEARTBEAT seconds; this only bounds stuck workers
+timeout = 60
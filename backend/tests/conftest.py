@@ -0,0 +1,62 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from config import Config
+from app import create_app, db
+from app.models.user import User
+from app.services import transcript_service, unread_count_service
+from app.utils import current_user
+from app.utils.cache import TTLCache
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    PROCESSING_WORKERS = 0
+    EMAIL_SENDER_ENABLED = False
+
+
+@pytest.fixture(scope='session')
+def app():
+    return create_app(TestConfig)
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        db.create_all()
+        yield
+        db.session.remove()
+        db.drop_all()
+        # Ids are reused by the next test's fresh tables, so process-local caches must not outlive them
+        for module in (current_user, transcript_service, unread_count_service):
+            for value in vars(module).values():
+                if isinstance(value, TTLCache):
+                    value.clear()
+
+
+@pytest.fixture
+def client(app, app_context):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app_context):
+    def make_user(role='student', email=None):
+        user = User(
+            email=email or f'{role}{User.query.count() + 1}@school.test',
+            first_name=role.title(),
+            last_name='User',
+            role=role,
+            password_hash='x'
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make_user
+
+
+@pytest.fixture
+def auth_headers():
+    def auth_headers(user):
+        return {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
+    return auth_headers
@@ -0,0 +1,27 @@
+from datetime import datetime
+from app import db
+from app.models.academic import Course, CourseEnrollment, Student
+from app.models.assignments import Assignment, AssignmentSubmission
+from app.services.assignment_analytics_service import AssignmentAnalyticsService
+
+
+def test_resubmissions_count_once_in_the_score_statistics(make_user):
+    course = Course(code='BIO101', name='Biology', credits=3, teacher_id=make_user('teacher').id)
+    students = [Student(user_id=make_user('student').id, registration_number=f'REG{number}') for number in range(2)]
+    db.session.add_all([course] + students)
+    db.session.flush()
+    assignment = Assignment(title='Lab', course_id=course.id, due_date=datetime(2024, 10, 1), max_score=100)
+    db.session.add(assignment)
+    db.session.flush()
+    db.session.add_all([CourseEnrollment(student_id=student.id, course_id=course.id) for student in students])
+
+    # The first student resubmitted twice; only the latest graded attempt counts
+    for student, score in [(students[0], 10), (students[0], 20), (students[0], 90), (students[1], 70)]:
+        db.session.add(AssignmentSubmission(assignment_id=assignment.id, student_id=student.id,
+                                            submission_date=datetime(2024, 9, 30), score=score))
+        db.session.flush()
+    db.session.commit()
+
+    [analytics] = AssignmentAnalyticsService.course_analytics(course.id)
+    assert analytics['submitted'] == analytics['graded'] == 2
+    assert analytics['score'] == {'min': 70, 'q1': 75.0, 'median': 80.0, 'q3': 85.0, 'max': 90, 'mean': 80.0}
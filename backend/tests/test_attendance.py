@@ -0,0 +1,51 @@
+from datetime import date
+from sqlalchemy import text
+from app import db
+from app.commands import create_indexes
+from app.models.academic import Attendance, Course, CourseEnrollment, Student
+
+
+def make_roll(make_user):
+    teacher = make_user('teacher')
+    course = Course(code='ART101', name='Art', credits=2, teacher_id=teacher.id)
+    student = Student(user_id=make_user('student').id, registration_number='REG1')
+    db.session.add_all([course, student])
+    db.session.flush()
+    db.session.add(CourseEnrollment(student_id=student.id, course_id=course.id))
+    db.session.commit()
+    return teacher, course, student
+
+
+def test_bulk_attendance_resubmission_updates_the_same_row(client, make_user, auth_headers):
+    teacher, course, student = make_roll(make_user)
+    body = {'course_id': course.id, 'date': '2024-09-02',
+            'records': [{'student_id': student.id, 'status': 'present'}]}
+
+    assert client.post('/api/academic/attendance/bulk', json=body, headers=auth_headers(teacher)).status_code == 201
+    body['records'][0]['status'] = 'late'
+    assert client.post('/api/academic/attendance/bulk', json=body, headers=auth_headers(teacher)).status_code == 201
+
+    assert [attendance.status for attendance in Attendance.query] == ['late']
+
+
+def test_second_single_mark_for_the_same_day_is_a_conflict(client, make_user, auth_headers):
+    teacher, course, student = make_roll(make_user)
+    body = {'student_id': student.id, 'course_id': course.id, 'date': '2024-09-02', 'status': 'present'}
+
+    assert client.post('/api/academic/attendance', json=body, headers=auth_headers(teacher)).status_code == 201
+    assert client.post('/api/academic/attendance', json=body, headers=auth_headers(teacher)).status_code == 409
+    assert Attendance.query.count() == 1
+
+
+def test_create_indexes_reports_duplicate_attendance(app, make_user):
+    teacher, course, student = make_roll(make_user)
+    db.session.execute(text('DROP INDEX ix_attendance_student_course_date'))
+    for status in ('present', 'absent'):
+        db.session.add(Attendance(student_id=student.id, course_id=course.id, date=date(2024, 9, 2), status=status))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(create_indexes)
+
+    assert result.exit_code != 0
+    assert (f'Duplicate attendance: student_id {student.id}, course_id {course.id}, '
+            f'date 2024-09-02 (2 rows)') in result.output
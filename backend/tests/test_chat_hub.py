@@ -0,0 +1,112 @@
+import json
+from datetime import timedelta
+from app import db
+from app.models.communication import ChatRoom, ChatParticipant
+from app.services.chat_hub import LocalBroker, PubSubHub, get_chat_hub
+
+
+def test_local_broker_delivers_to_subscribers_of_the_channel():
+    hub = PubSubHub(LocalBroker(), queue_size=10)
+    room_one = hub.subscribe(['room:1'])
+    both_rooms = hub.subscribe(['room:1', 'room:2'])
+
+    hub.publish('room:1', {'id': 1})
+    hub.publish('room:2', {'id': 2})
+
+    assert room_one.get(0) == ('room:1', {'id': 1})
+    assert room_one.get(0) is None
+    assert both_rooms.get(0) == ('room:1', {'id': 1})
+    assert both_rooms.get(0) == ('room:2', {'id': 2})
+    assert hub.subscriber_count() == 2
+
+    room_one.close()
+    both_rooms.close()
+    assert hub.subscriber_count() == 0
+
+
+def test_slow_subscriber_is_dropped_when_its_queue_overflows():
+    hub = PubSubHub(LocalBroker(), queue_size=2)
+    subscription = hub.subscribe(['room:1'])
+
+    for message_id in range(3):
+        hub.publish('room:1', {'id': message_id})
+
+    assert subscription.overflowed
+    assert hub.subscriber_count() == 0
+
+
+def read_event(chunks):
+    for chunk in chunks:
+        text = chunk.decode('utf-8')
+        if text.startswith('id:'):
+            return json.loads(text.split('data: ', 1)[1])
+
+
+def test_stream_needs_a_stream_token_and_relays_new_messages(app, client, make_user, auth_headers, monkeypatch):
+    monkeypatch.setitem(app.config, 'CHAT_STREAM_HEARTBEAT', 0.05)
+    user = make_user('teacher')
+    room = ChatRoom(name='Staff room')
+    db.session.add(room)
+    db.session.flush()
+    db.session.add(ChatParticipant(chat_room_id=room.id, user_id=user.id))
+    db.session.commit()
+    room_id = room.id
+    access_token = auth_headers(user)['Authorization'].split()[1]
+
+    # The main access token never opens the stream, even in the URL
+    assert client.get(f'/api/communication/chat/stream?jwt={access_token}').status_code == 401
+
+    stream_token = client.post('/api/communication/chat/stream-token',
+                               headers=auth_headers(user)).json['stream_token']
+    # ... and a stream token opens nothing else
+    assert client.get('/api/communication/unread-counts',
+                      headers={'Authorization': f'Bearer {stream_token}'}).status_code == 400
+
+    response = client.get(f'/api/communication/chat/stream?jwt={stream_token}', buffered=False)
+    assert response.status_code == 200
+    chunks = response.response
+    assert next(chunks) == b'retry: 3000\n\n'
+    assert next(chunks) == b': keep-alive\n\n'
+
+    get_chat_hub().publish(f'room:{room_id}', {'id': 7, 'content': 'hello'})
+    assert read_event(chunks) == {'id': 7, 'content': 'hello'}
+    response.close()
+
+
+def test_reconnect_with_a_fresh_token_replays_from_last_event_id(app, client, make_user, auth_headers, monkeypatch):
+    monkeypatch.setitem(app.config, 'CHAT_STREAM_HEARTBEAT', 0.05)
+    user = make_user('teacher')
+    room = ChatRoom(name='Staff room')
+    db.session.add(room)
+    db.session.flush()
+    db.session.add(ChatParticipant(chat_room_id=room.id, user_id=user.id))
+    db.session.commit()
+    room_id = room.id
+
+    def send(content):
+        return client.post(f'/api/communication/chat/rooms/{room_id}/messages',
+                           json={'content': content}, headers=auth_headers(user)).json['id']
+
+    def stream_token():
+        return client.post('/api/communication/chat/stream-token', headers=auth_headers(user)).json['stream_token']
+
+    response = client.get(f'/api/communication/chat/stream?jwt={stream_token()}', buffered=False)
+    first_id = send('first')
+    assert read_event(response.response)['content'] == 'first'
+    response.close()
+
+    # The browser's automatic reconnect reuses the URL, whose token has expired by then
+    monkeypatch.setitem(app.config, 'CHAT_STREAM_TOKEN_EXPIRES', timedelta(seconds=-1))
+    expired_token = stream_token()
+    assert client.get(f'/api/communication/chat/stream?jwt={expired_token}&last_event_id={first_id}').status_code == 401
+    monkeypatch.undo()
+    monkeypatch.setitem(app.config, 'CHAT_STREAM_HEARTBEAT', 0.05)
+
+    send('second')
+    send('third')
+    response = client.get(f'/api/communication/chat/stream?jwt={stream_token()}&last_event_id={first_id}',
+                          buffered=False)
+    assert response.status_code == 200
+    chunks = response.response
+    assert [read_event(chunks)['content'], read_event(chunks)['content']] == ['second', 'third']
+    response.close()
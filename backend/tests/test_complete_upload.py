@@ -0,0 +1,22 @@
+import hashlib
+import io
+from app import db
+from app.models.assignments import UploadSession
+from app.services.upload_service import UploadService
+
+
+def test_completing_a_submission_without_a_student_profile_is_not_found(app, client, make_user, auth_headers,
+                                                                        tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    user = make_user('student')
+    upload = UploadService.create(user.id, 'assignment', 'essay.txt', 5, {'assignment_id': 1})
+    db.session.add(upload)
+    db.session.commit()
+    UploadService.append(upload, 0, io.BytesIO(b'essay'))
+    db.session.commit()
+
+    response = client.post(f'/api/assignments/uploads/{upload.id}/complete', headers=auth_headers(user),
+                           json={'sha256': hashlib.sha256(b'essay').hexdigest()})
+
+    assert response.status_code == 404
+    assert UploadSession.query.get(upload.id).status == 'uploading'
@@ -0,0 +1,74 @@
+from datetime import date
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models.academic import Attendance, Course, CourseEnrollment, Grade, Student
+
+
+@pytest.fixture
+def course(make_user):
+    teacher = make_user('teacher')
+    course = Course(code='MATH101', name='Mathematics', credits=3, teacher_id=teacher.id)
+    db.session.add(course)
+    db.session.flush()
+
+    for number in range(3):
+        user = make_user('student')
+        student = Student(user_id=user.id, registration_number=f'REG{number}', current_grade='10')
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(CourseEnrollment(student_id=student.id, course_id=course.id))
+        db.session.add(Attendance(student_id=student.id, course_id=course.id, date=date(2024, 9, 2), status='present'))
+        db.session.add(Grade(student_id=student.id, course_id=course.id, assessment_type='exam', score=80, max_score=100))
+    db.session.commit()
+    return course, teacher
+
+
+def query_plans(client, url, headers):
+    """EXPLAIN QUERY PLAN for every SELECT the route runs"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200
+
+    connection = db.session.connection().connection
+    return [
+        ' '.join(row[-1] for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters))
+        for statement, parameters in statements
+    ]
+
+
+def uses_index(plans, table, index):
+    return any(f'{table} USING INDEX {index}' in plan or f'{table} USING COVERING INDEX {index}' in plan
+               for plan in plans)
+
+
+def test_course_attendance_uses_course_date_index(client, course, auth_headers):
+    course, teacher = course
+    plans = query_plans(client, f'/api/academic/attendance/course/{course.id}/date/2024-09-02', auth_headers(teacher))
+    assert uses_index(plans, 'attendance', 'ix_attendance_course_date'), plans
+
+
+def test_student_course_grades_use_student_course_index(client, course, auth_headers):
+    course, teacher = course
+    student = Student.query.first()
+    plans = query_plans(client, f'/api/academic/grades/student/{student.id}/course/{course.id}', auth_headers(teacher))
+    assert uses_index(plans, 'grade', 'ix_grade_student_course'), plans
+
+
+def test_course_enrollments_use_enrollment_index(client, course, auth_headers):
+    course, teacher = course
+    plans = query_plans(client, f'/api/academic/enrollment/course/{course.id}', auth_headers(teacher))
+    assert any(
+        uses_index(plans, 'course_enrollment', index)
+        for index in ('ix_course_enrollment_course_status', 'ix_course_enrollment_student_course')
+    ), plans
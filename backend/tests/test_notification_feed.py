@@ -0,0 +1,22 @@
+from app import db
+from app.models.communication import Announcement, Notification
+
+
+def test_broadcast_entries_carry_the_key_that_marks_them_read(client, make_user, auth_headers):
+    admin, teacher = make_user('admin'), make_user('teacher')
+    announcement = Announcement(title='Closure', content='Closed Friday', sender_id=admin.id, target_role='all')
+    notification = Notification(user_id=teacher.id, title='Hi', content='Hello', type='message')
+    db.session.add_all([announcement, notification])
+    db.session.commit()
+
+    feed = client.get('/api/communication/notifications', headers=auth_headers(teacher)).json
+    entries = {entry['type']: entry for entry in feed}
+    assert entries['announcement']['announcement_id'] == announcement.id
+    assert entries['announcement']['read'] is False
+    assert len({entry['feed_id'] for entry in feed}) == 2
+
+    url = f"/api/communication/announcements/{entries['announcement']['announcement_id']}/read"
+    assert client.post(url, headers=auth_headers(teacher)).status_code == 200
+    assert client.get('/api/communication/notifications/unread', headers=auth_headers(teacher)).json == [
+        dict(notification.to_dict(), feed_id=notification.id * 2)
+    ]
@@ -0,0 +1,33 @@
+import time
+import pytest
+from app.services import password_service
+from app.services.password_service import PasswordService, PasswordPoolBusy
+
+
+@pytest.fixture
+def small_pool(app, app_context, monkeypatch):
+    for key, value in {'BCRYPT_POOL_SIZE': 1, 'BCRYPT_MAX_PENDING': 1, 'BCRYPT_TIMEOUT': 0.05,
+                       'BCRYPT_ROUNDS': 14}.items():
+        monkeypatch.setitem(app.config, key, value)
+    monkeypatch.setattr(password_service, '_pool', None)
+    monkeypatch.setattr(password_service, '_metrics', dict(password_service._metrics, in_flight=0))
+    yield
+    password_service._pool.shutdown(cancel_futures=True)
+
+
+def test_timed_out_hash_keeps_its_slot_until_the_pool_finishes_it(small_pool):
+    with pytest.raises(PasswordPoolBusy):
+        PasswordService.hash('slow password')
+    assert PasswordService.metrics()['in_flight'] == 1
+
+    # The abandoned job is still running, so the pool stays full
+    with pytest.raises(PasswordPoolBusy):
+        PasswordService.hash('another password')
+    assert PasswordService.metrics()['rejected'] >= 1
+
+    deadline = time.monotonic() + 30
+    while PasswordService.metrics()['in_flight'] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert PasswordService.metrics()['in_flight'] == 0
+    assert password_service._slots.acquire(blocking=False)
+    password_service._slots.release()
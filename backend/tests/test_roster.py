@@ -0,0 +1,48 @@
+from app import db
+from app.models.academic import Course, CourseEnrollment, Student
+
+
+def make_course(make_user):
+    teacher = make_user('teacher')
+    course = Course(code='SCI101', name='Science', credits=3, teacher_id=teacher.id)
+    db.session.add(course)
+    db.session.flush()
+    for number in range(5):
+        user = make_user('student')
+        student = Student(user_id=user.id, registration_number=f'REG{number}')
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(CourseEnrollment(student_id=student.id, course_id=course.id,
+                                        status='dropped' if number == 4 else 'active'))
+    db.session.commit()
+    return course, teacher
+
+
+def test_roster_pages_follow_the_next_cursor(client, make_user, auth_headers):
+    course, teacher = make_course(make_user)
+
+    pages = []
+    params = {'status': 'active', 'limit': 2}
+    while True:
+        response = client.get(f'/api/academic/enrollment/course/{course.id}',
+                              query_string=params, headers=auth_headers(teacher))
+        assert response.status_code == 200
+        pages.append([student['registration_number'] for student in response.json])
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+        params['after'] = cursor
+
+    assert pages == [['REG0', 'REG1'], ['REG2', 'REG3']]
+    assert response.json[0]['first_name'] == 'Student'
+    assert response.json[0]['enrollment_status'] == 'active'
+
+
+def test_roster_without_limit_or_cursor_is_returned_whole(app, client, make_user, auth_headers, monkeypatch):
+    monkeypatch.setitem(app.config, 'PAGINATION_DEFAULT_LIMIT', 2)
+    course, teacher = make_course(make_user)
+
+    response = client.get(f'/api/academic/enrollment/course/{course.id}', headers=auth_headers(teacher))
+
+    assert len(response.json) == 5
+    assert 'X-Next-Cursor' not in response.headers
@@ -0,0 +1,38 @@
+import hashlib
+import os
+from app import db
+from app.models.academic import Course
+from app.models.assignments import CourseMaterial
+from app.services.blob_store import BlobStore
+
+
+def test_thumbnail_is_served_by_url_and_collected_with_its_blob(app, client, make_user, auth_headers,
+                                                               tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    teacher = make_user('teacher')
+    course = Course(code='ART101', name='Art', credits=2, teacher_id=teacher.id)
+    db.session.add(course)
+    db.session.flush()
+
+    source = tmp_path / 'upload.png'
+    source.write_bytes(b'\x89PNG\r\n\x1a\n image')
+    sha256 = hashlib.sha256(source.read_bytes()).hexdigest()
+    material = CourseMaterial(title='Poster', course_id=course.id, file_hash=sha256,
+                              file_path=BlobStore.store_file(str(source), sha256),
+                              file_metadata={'mime_type': 'image/png', 'thumbnail': True})
+    db.session.add(material)
+    db.session.commit()
+    os.makedirs(BlobStore.thumbnail_root())
+    with open(BlobStore.thumbnail_path(sha256), 'wb') as thumbnail:
+        thumbnail.write(b'jpeg')
+
+    processing = client.get(f'/api/assignments/materials/{material.id}/processing', headers=auth_headers(teacher))
+    thumbnail_url = processing.json['file_metadata']['thumbnail_url']
+    assert thumbnail_url == f'/api/assignments/materials/{material.id}/thumbnail'
+    assert str(tmp_path) not in str(processing.json)
+    assert client.get(thumbnail_url, headers=auth_headers(teacher)).data == b'jpeg'
+
+    assert client.delete(f'/api/assignments/materials/{material.id}', headers=auth_headers(teacher)).status_code == 204
+    BlobStore.collect_garbage(grace_period=0)
+    assert not os.path.exists(BlobStore.path_for(sha256))
+    assert os.listdir(BlobStore.thumbnail_root()) == []
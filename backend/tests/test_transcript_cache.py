@@ -0,0 +1,46 @@
+from app import db
+from app.models.academic import Course, CourseEnrollment, Grade, GradeSummary, Student
+from app.services.grade_summary_service import GradeSummaryService
+from app.services.transcript_service import TranscriptService
+
+
+def make_graded_student(make_user):
+    course = Course(code='MAT101', name='Maths', credits=3, teacher_id=make_user('teacher').id)
+    student = Student(user_id=make_user('student').id, registration_number='REG1')
+    db.session.add_all([course, student])
+    db.session.flush()
+    db.session.add(CourseEnrollment(student_id=student.id, course_id=course.id))
+    grade = Grade(student_id=student.id, course_id=course.id, assessment_type='exam', score=90, max_score=100)
+    db.session.add(grade)
+    GradeSummaryService.record([grade])
+    db.session.commit()
+    return student, course
+
+
+def percentage(student):
+    return TranscriptService.transcript(student.id)['periods'][0]['courses'][0]['percentage']
+
+
+def test_write_from_another_worker_retires_the_cached_transcript(make_user):
+    student, course = make_graded_student(make_user)
+    assert percentage(student) == 90
+
+    # No invalidate call, as when another process commits the change
+    GradeSummary.query.one().score_sum = 50
+    db.session.commit()
+
+    assert percentage(student) == 50
+
+
+def test_invalidation_waits_for_the_commit(make_user):
+    student, course = make_graded_student(make_user)
+    assert percentage(student) == 90
+
+    grade = Grade(student_id=student.id, course_id=course.id, assessment_type='exam', score=10, max_score=100)
+    db.session.add(grade)
+    GradeSummaryService.record([grade])
+    assert db.session.info['transcript_invalidations'] == {student.id}
+    db.session.rollback()
+
+    assert 'transcript_invalidations' not in db.session.info
+    assert percentage(student) == 90
@@ -0,0 +1,27 @@
+from app import db
+from app.commands import upgrade_db
+from app.models.academic import Course, Grade, GradeSummary, Student
+
+
+def test_upgrade_db_backfills_an_empty_grade_summary(app, make_user):
+    teacher = make_user('teacher')
+    user = make_user('student')
+    course = Course(code='HIS101', name='History', credits=3, teacher_id=teacher.id)
+    student = Student(user_id=user.id, registration_number='REG1')
+    db.session.add_all([course, student])
+    db.session.flush()
+    # Grades written before grade_summary existed have no summary rows
+    db.session.add_all([
+        Grade(student_id=student.id, course_id=course.id, assessment_type='exam', score=70, max_score=100),
+        Grade(student_id=student.id, course_id=course.id, assessment_type='exam', score=90, max_score=100)
+    ])
+    db.session.commit()
+    GradeSummary.query.delete()
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(upgrade_db)
+
+    assert result.exit_code == 0, result.output
+    assert 'Rebuilt 1 grade summary rows' in result.output
+    summary = GradeSummary.query.one()
+    assert (summary.count, summary.score_sum) == (2, 160)
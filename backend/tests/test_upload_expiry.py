@@ -0,0 +1,80 @@
+import io
+import os
+import time
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.assignments import UploadSession
+from app.services import upload_service
+from app.services.blob_store import BlobStore
+from app.services.upload_service import UploadService, UploadError
+
+
+@pytest.fixture
+def upload_folder(app, app_context, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    return tmp_path
+
+
+def test_expired_sessions_are_swept_with_their_part_files(upload_folder, make_user):
+    user = make_user('teacher')
+    active = UploadService.create(user.id, 'material', 'notes.pdf', 10)
+    stale = UploadService.create(user.id, 'material', 'old.pdf', 10)
+    db.session.add_all([active, stale])
+    db.session.commit()
+    UploadService.append(stale, 0, io.BytesIO(b'abc'))
+    stale.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+    assert UploadService.expire_sessions() == (1, 1)
+    assert [upload.id for upload in UploadSession.query] == [active.id]
+    assert not os.path.exists(UploadService.part_path(stale.id))
+    assert os.path.exists(UploadService.part_path(active.id))
+    assert stale.id not in upload_service._hashers
+
+
+def test_expired_session_rejects_chunks(upload_folder, make_user):
+    user = make_user('teacher')
+    upload = UploadService.create(user.id, 'material', 'notes.pdf', 10)
+    upload.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.add(upload)
+    db.session.commit()
+
+    with pytest.raises(UploadError) as error:
+        UploadService.append(upload, 0, io.BytesIO(b'abc'))
+    assert error.value.status_code == 410
+
+
+def test_temp_files_are_swept_by_session_state_not_age(upload_folder, make_user):
+    user = make_user('teacher')
+    upload = UploadService.create(user.id, 'material', 'notes.pdf', 10)
+    db.session.add(upload)
+    db.session.commit()
+
+    gone = os.path.join(UploadService.temp_dir(), 'deleted-session.part')
+    crashed = BlobStore.temp_path()
+    in_flight = BlobStore.temp_path()
+    for path in (gone, crashed, in_flight):
+        open(path, 'wb').close()
+    old = time.time() - 7200
+    for path in (crashed, UploadService.part_path(upload.id)):
+        os.utime(path, (old, old))
+
+    # The live session's part file is old, as while a slow finalize runs, and is kept
+    assert UploadService.expire_sessions(grace_period=3600) == (0, 2)
+    assert sorted(os.listdir(UploadService.temp_dir())) == sorted(
+        [os.path.basename(in_flight), f'{upload.id}.part']
+    )
+
+
+def test_expired_session_cannot_be_finalized(upload_folder, make_user):
+    user = make_user('teacher')
+    upload = UploadService.create(user.id, 'material', 'notes.pdf', 3)
+    db.session.add(upload)
+    db.session.commit()
+    UploadService.append(upload, 0, io.BytesIO(b'abc'))
+    upload.expires_at = datetime.utcnow() - timedelta(seconds=1)
+
+    with pytest.raises(UploadError) as error:
+        UploadService.finalize(upload)
+    assert error.value.status_code == 410
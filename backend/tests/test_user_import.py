@@ -0,0 +1,54 @@
+import io
+import os
+import pytest
+from app.models.user import User, UserImport
+from app.services.processing_service import ProcessingService
+
+
+@pytest.fixture
+def admin(app, app_context, make_user, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setitem(app.config, 'IMPORT_HASH_WORKERS', 1)
+    monkeypatch.setitem(app.config, 'BCRYPT_ROUNDS', 4)
+    return make_user('admin')
+
+
+def csv_file(count):
+    lines = ['email,first_name,last_name,role,password']
+    lines += [f'teacher{number}@import.test,T{number},Imported,teacher,secret{number}' for number in range(count)]
+    return io.BytesIO('\n'.join(lines).encode('utf-8')), 'users.csv'
+
+
+def test_import_is_queued_and_run_by_the_processing_workers(client, admin, auth_headers, tmp_path):
+    response = client.post('/api/users/import', headers=auth_headers(admin), data={'file': csv_file(2)})
+
+    assert response.status_code == 202
+    assert response.json['processing_status'] == 'pending'
+    assert User.query.filter_by(role='teacher').count() == 0
+
+    assert ProcessingService.process_pending() == 1
+
+    status = client.get(response.headers['Location'], headers=auth_headers(admin))
+    assert status.json['processing_status'] == 'done'
+    assert status.json['report']['created'] == 2
+    assert User.query.filter_by(role='teacher').count() == 2
+    assert UserImport.query.one().file_path is None
+    assert os.listdir(tmp_path / 'imports') == []
+
+
+def test_dry_run_is_answered_directly(client, admin, auth_headers):
+    response = client.post('/api/users/import?dry_run=true', headers=auth_headers(admin),
+                           data={'file': csv_file(5)})
+
+    assert response.status_code == 200
+    assert response.json['created'] == 5
+    assert User.query.filter_by(role='teacher').count() == 0
+
+
+def test_unsupported_file_is_refused_with_the_upload(client, admin, auth_headers, tmp_path):
+    response = client.post('/api/users/import', headers=auth_headers(admin),
+                           data={'file': (io.BytesIO(b'not a sheet'), 'users.txt')})
+
+    assert response.status_code == 400
+    assert UserImport.query.count() == 0
+    assert os.listdir(tmp_path / 'imports') == []
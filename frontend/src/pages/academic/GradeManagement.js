@@ -63,13 +63,20 @@ const GradeManagement = () => {
 
   const fetchStudents = async () => {
     try {
-      const response = await fetch(`/api/academic/enrollment/course/${selectedCourse}`, {
-        headers: {
-          'Authorization': `Bearer ${localStorage.getItem('token')}`,
-        },
-      });
-      const data = await response.json();
-      setStudents(data);
+      // The roster is paginated; follow X-Next-Cursor until the last page
+      const roster = [];
+      let cursor = null;
+      do {
+        const query = cursor ? `?after=${encodeURIComponent(cursor)}` : '';
+        const response = await fetch(`/api/academic/enrollment/course/${selectedCourse}${query}`, {
+          headers: {
+            'Authorization': `Bearer ${localStorage.getItem('token')}`,
+          },
+        });
+        roster.push(...(await response.json()));
+        cursor = response.headers.get('X-Next-Cursor');
+      } while (cursor);
+      setStudents(roster);
     } catch (error) {
       console.error('Error fetching students:', error);
     }
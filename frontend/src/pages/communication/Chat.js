@@ -66,6 +66,53 @@ const Chat = () => {
     }
   }, [selectedRoom]);
 
+  useEffect(() => {
+    if (!selectedRoom) return undefined;
+
+    // Stream tokens expire a minute after they are issued, so the browser's own
+    // reconnect to the same URL is refused; every (re)connect fetches a fresh
+    // token and resumes after the last message id seen
+    let source = null;
+    let lastEventId = null;
+    let retryTimer = null;
+    let closed = false;
+
+    const reconnect = () => {
+      if (!closed) retryTimer = setTimeout(connect, 3000);
+    };
+
+    const connect = async () => {
+      try {
+        const response = await axios.post('/api/communication/chat/stream-token');
+        if (closed) return;
+        const params = new URLSearchParams({ jwt: response.data.stream_token, rooms: selectedRoom.id });
+        if (lastEventId) params.set('last_event_id', lastEventId);
+        source = new EventSource(`/api/communication/chat/stream?${params}`);
+        source.addEventListener('message', (event) => {
+          lastEventId = event.lastEventId;
+          const message = JSON.parse(event.data);
+          setMessages((current) =>
+            current.some((m) => m.id === message.id) ? current : [...current, message]
+          );
+        });
+        source.onerror = () => {
+          source.close();
+          reconnect();
+        };
+      } catch (error) {
+        console.error('Error opening chat stream:', error);
+        reconnect();
+      }
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  }, [selectedRoom]);
+
   useEffect(() => {
     scrollToBottom();
   }, [messages]);